@@ -0,0 +1,35 @@
+"""movie data jsonb
+
+Revision ID: 3b7e1c9d2a41
+Revises: f8aa86bb0a97
+Create Date: 2026-10-18 09:12:41.218305
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = '3b7e1c9d2a41'
+down_revision: Union[str, None] = 'f8aa86bb0a97'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # existing rows hold serialized json documents, so they are converted in place
+    op.alter_column('movie', 'data',
+               existing_type=sa.String(),
+               type_=postgresql.JSONB(astext_type=sa.Text()),
+               existing_nullable=False,
+               postgresql_using='data::jsonb')
+
+
+def downgrade() -> None:
+    op.alter_column('movie', 'data',
+               existing_type=postgresql.JSONB(astext_type=sa.Text()),
+               type_=sa.String(),
+               existing_nullable=False,
+               postgresql_using='data::text')
@@ -0,0 +1,29 @@
+"""hashing algorithm kdfs
+
+Revision ID: 5e8a0f3c71d2
+Revises: 9c4d27f1e6b8
+Create Date: 2026-10-18 15:33:12.804417
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5e8a0f3c71d2'
+down_revision: Union[str, None] = '9c4d27f1e6b8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("ALTER TYPE hashing_algorithm_enum ADD VALUE IF NOT EXISTS 'SCRYPT'")
+    op.execute("ALTER TYPE hashing_algorithm_enum ADD VALUE IF NOT EXISTS 'PBKDF2_SHA256'")
+
+
+def downgrade() -> None:
+    # postgresql cannot drop enum values and hashes made by new algorithms cannot be converted back,
+    # so new values are left in place
+    pass
@@ -1,96 +1,54 @@
 from __future__ import annotations
 
+from contextlib import asynccontextmanager
 from typing import TYPE_CHECKING
 
 from fastapi import FastAPI
-from fastapi.responses import JSONResponse
 
+from src.auth.hashing import password_hasher
 from src.auth.routes import router as auth_router
+from src.config import CONFIG
+from src.monitoring.routes import router as monitoring_router
+from src.movies.kinopoisk import kinopoisk_client
+from src.movies.refresh import movie_refresher
 from src.movies.routes import router as movie_router
-from src.shared.exceptions import (
-    BadGatewayException,
-    BadRequestException,
-    InternalServerError,
-    NotAllowedException,
-    NotAuthenticatedException,
-    NotFoundException,
-)
+from src.movies.warmup import cache_warmer
+from src.shared.error_responses import error_responses
+from src.shared.exceptions import HTTPException
 
 
 if TYPE_CHECKING:
-    from fastapi import Request
-
-
-app = FastAPI()
-
-app.include_router(auth_router)
-app.include_router(movie_router)
-
-
-@app.exception_handler(BadRequestException)
-async def handle_bad_request(_: Request, exception: BadRequestException) -> JSONResponse:
-    return JSONResponse(
-        status_code=exception.status_code,
-        content={
-            "action": exception.action,
-            "description": exception.description,
-            "details": exception.details,
-        },
-    )
-
-
-@app.exception_handler(NotAllowedException)
-async def handle_not_allowed(_: Request, exception: NotAllowedException) -> JSONResponse:
-    return JSONResponse(
-        status_code=exception.status_code,
-        content={
-            "action": exception.action,
-            "description": exception.description,
-            "details": exception.details,
-        },
-    )
+    from collections.abc import AsyncIterator
 
+    from fastapi import Request
+    from fastapi.responses import Response
 
-@app.exception_handler(NotAuthenticatedException)
-async def handle_not_authenticated(_: Request, exception: NotAuthenticatedException) -> JSONResponse:
-    return JSONResponse(
-        status_code=exception.status_code,
-        content={
-            "description": exception.description,
-            "details": exception.details,
-        },
-    )
 
+@asynccontextmanager
+async def lifespan(_: FastAPI) -> AsyncIterator[None]:
+    """Manage resources shared between requests: open them on startup and release on shutdown."""
+    error_responses.prerender()
+    await kinopoisk_client.start()
+    if CONFIG.WARMUP_ENABLED:
+        cache_warmer.start()
+    if CONFIG.MOVIE_REFRESH_ENABLED:
+        movie_refresher.start()
+    try:
+        yield
+    finally:
+        await movie_refresher.stop()
+        await cache_warmer.stop()
+        await kinopoisk_client.close()
+        password_hasher.shutdown()
 
-@app.exception_handler(NotFoundException)
-async def handle_not_found(_: Request, exception: NotFoundException) -> JSONResponse:
-    return JSONResponse(
-        status_code=exception.status_code,
-        content={
-            "resource": exception.resource,
-            "description": exception.description,
-            "details": exception.details,
-        },
-    )
 
+app = FastAPI(lifespan=lifespan)
 
-@app.exception_handler(BadGatewayException)
-async def handle_bad_gateway(_: Request, exception: BadGatewayException) -> JSONResponse:
-    return JSONResponse(
-        status_code=exception.status_code,
-        content={
-            "description": exception.description,
-            "details": exception.details,
-        },
-    )
+app.include_router(auth_router)
+app.include_router(movie_router)
+app.include_router(monitoring_router)
 
 
-@app.exception_handler(InternalServerError)
-async def handle_internal_server(_: Request, exception: InternalServerError) -> JSONResponse:
-    return JSONResponse(
-        status_code=exception.status_code,
-        content={
-            "description": exception.description,
-            "details": exception.details,
-        },
-    )
+@app.exception_handler(HTTPException)
+async def handle_http_exception(_: Request, exception: HTTPException) -> Response:
+    return error_responses.response(exception)
@@ -0,0 +1,36 @@
+from __future__ import annotations
+
+import time
+from typing import TYPE_CHECKING
+
+from src.config import CONFIG
+from src.shared.cache import TTLCache
+from src.shared.metrics import metrics
+
+
+if TYPE_CHECKING:
+    from src.auth.schemas import TokenPayload
+
+
+# ids of profiles known to exist, entries live shortly since every app worker has its own cache
+# and profile deletion in one worker cannot invalidate caches of the others
+profile_cache: TTLCache[int, bool] = TTLCache(
+    max_items=CONFIG.AUTH_PROFILE_CACHE_SIZE,
+    ttl=CONFIG.AUTH_PROFILE_CACHE_TTL,
+)
+
+# validated token payloads keyed by token digest, each entry expires exactly when its token does
+# so cache uses wall clock to be comparable with token's `exp` claim
+token_cache: TTLCache[bytes, TokenPayload] = TTLCache(
+    max_items=CONFIG.AUTH_TOKEN_CACHE_SIZE,
+    ttl=0,
+    clock=time.time,
+)
+
+metrics.register("profile_cache", profile_cache.collect_metrics)
+metrics.register("token_cache", token_cache.collect_metrics)
+
+
+def invalidate_profile(profile_id: int) -> None:
+    """Forget that profile exists. Must be called whenever profile is deleted."""
+    profile_cache.invalidate(profile_id)
@@ -3,7 +3,9 @@ from __future__ import annotations
 from typing import TYPE_CHECKING
 
 from src.auth.models import Profile
+from src.auth.ratelimit import login_rate_limiter
 from src.auth.schemas import ProfileData, Token, TokenPayload
+from src.shared.database import mark_written
 
 
 if TYPE_CHECKING:
@@ -14,11 +16,14 @@ if TYPE_CHECKING:
 
 async def register(credentials: Credentials, db_session: AsyncSession) -> ProfileData:
     profile = await Profile.register(credentials=credentials, db_session=db_session)
+    mark_written(profile.id)
 
     return ProfileData.model_validate(profile, from_attributes=True)
 
 
-async def login(credentials: Credentials, db_session: AsyncSession) -> Token:
+async def login(credentials: Credentials, db_session: AsyncSession, client_host: str | None) -> Token:
+    await login_rate_limiter.check(credentials.name, client_host)
+
     profile = await Profile.get_by_credentials(credentials=credentials, db_session=db_session)
 
     token_payload = TokenPayload(profile_id=profile.id)
@@ -6,10 +6,12 @@ from fastapi import Depends
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer  # noqa: TCH002
 from jwt.exceptions import InvalidSignatureError
 
-from src.auth.exceptions import InvalidTokenException, ProfileNotFoundException
+from src.auth.cache import profile_cache
+from src.auth.exceptions import InvalidTokenException
 from src.auth.models import Profile
 from src.auth.schemas import TokenPayload
-from src.shared.database import get_session
+from src.config import CONFIG
+from src.shared.database import get_read_session, read_your_writes, release_connection
 
 
 if TYPE_CHECKING:
@@ -21,7 +23,7 @@ bearer = HTTPBearer(description="JWT access token.")
 
 async def get_token(
     token: Annotated[HTTPAuthorizationCredentials, Depends(bearer)],
-    db_session: AsyncSession = Depends(get_session),
+    db_session: AsyncSession = Depends(get_read_session),
 ) -> TokenPayload:
     """Validate authorization token."""
     try:
@@ -29,7 +31,17 @@ async def get_token(
     except InvalidSignatureError:
         raise InvalidTokenException from None
 
-    if not await Profile.get_profile(db_session=db_session, profile_id=payload.profile_id):
-        raise ProfileNotFoundException
+    # whole request is served by the primary if current user has just changed something
+    read_your_writes(db_session, payload.profile_id)
+
+    if CONFIG.AUTH_TRUST_SIGNED_TOKEN or profile_cache.get(payload.profile_id):
+        return payload
+
+    # raises an exception if profile doesn't exist
+    await Profile.get_profile(db_session=db_session, profile_id=payload.profile_id)
+    profile_cache.set(payload.profile_id, True)  # noqa: FBT003
+
+    # don't keep connection while the rest of request is handled
+    await release_connection(db_session)
 
     return payload
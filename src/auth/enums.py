@@ -7,6 +7,8 @@ class HashingAlgorithm(Enum):
     """Enumeration for hashing algorithms."""
 
     SHA256 = "sha256"
+    SCRYPT = "scrypt"
+    PBKDF2_SHA256 = "pbkdf2_sha256"
 
 
 class SignatureAlgorithm(Enum):
@@ -19,3 +21,4 @@ class Encoding(Enum):
     """Enumeration for encodings."""
 
     ASCII = "ascii"
+    UTF8 = "utf-8"
@@ -2,7 +2,13 @@ from __future__ import annotations
 
 from fastapi import status
 
-from src.shared.exceptions import BadRequestException, NotAllowedException, NotAuthenticatedException, NotFoundException
+from src.shared.exceptions import (
+    BadRequestException,
+    NotAllowedException,
+    NotAuthenticatedException,
+    NotFoundException,
+    TooManyRequestsException,
+)
 
 
 class ProfileNotFoundException(NotFoundException):
@@ -33,3 +39,9 @@ class InvalidTokenException(NotAllowedException):
     description = "Invalid token."
     details = "Provided tokens or credentials don't grant you enough access rights."
     status_code = status.HTTP_403_FORBIDDEN
+
+
+class TooManyLoginAttemptsException(TooManyRequestsException):
+    description = "Too many login attempts."
+    details = "Login attempts limit for this profile or address is exceeded, please try again later."
+    status_code = status.HTTP_429_TOO_MANY_REQUESTS
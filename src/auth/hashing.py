@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import hmac
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING
+
+from src.auth.enums import Encoding, HashingAlgorithm
+from src.config import CONFIG
+
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+    from typing import Final, Self
+
+
+# parameters are not stored alongside hashes, changing them invalidates existing hashes of that algorithm
+_SCRYPT_N: Final = 2**14
+_SCRYPT_R: Final = 8
+_SCRYPT_P: Final = 1
+_SCRYPT_DKLEN: Final = 64
+_PBKDF2_ITERATIONS: Final = 600_000
+
+
+def _sha256(password: str, salt: str) -> str:
+    # legacy algorithm, kept only to verify existing hashes
+    hash_object = hashlib.sha256()
+    hash_object.update((password + salt).encode(Encoding.ASCII.value))
+    return hash_object.hexdigest()
+
+
+def _scrypt(password: str, salt: str) -> str:
+    return hashlib.scrypt(
+        password.encode(Encoding.UTF8.value),
+        salt=salt.encode(Encoding.ASCII.value),
+        n=_SCRYPT_N,
+        r=_SCRYPT_R,
+        p=_SCRYPT_P,
+        dklen=_SCRYPT_DKLEN,
+    ).hex()
+
+
+def _pbkdf2_sha256(password: str, salt: str) -> str:
+    return hashlib.pbkdf2_hmac(
+        "sha256",
+        password.encode(Encoding.UTF8.value),
+        salt.encode(Encoding.ASCII.value),
+        _PBKDF2_ITERATIONS,
+    ).hex()
+
+
+_HASH_FUNCTIONS: Final[dict[HashingAlgorithm, Callable[[str, str], str]]] = {
+    HashingAlgorithm.SHA256: _sha256,
+    HashingAlgorithm.SCRYPT: _scrypt,
+    HashingAlgorithm.PBKDF2_SHA256: _pbkdf2_sha256,
+}
+
+
+class PasswordHasher:
+    """Password hashing engine which keeps CPU-heavy hashing off the event loop.
+
+    Hashing runs in a bounded thread pool, `hashlib` key derivation functions release the GIL,
+    so concurrent logins neither block the loop nor each other beyond the pool size.
+    """
+
+    def __init__(self: Self, algorithm: HashingAlgorithm, max_workers: int) -> None:
+        """Create engine, thread pool is started lazily."""
+        self.algorithm = algorithm
+        self.max_workers = max_workers
+        self._executor: ThreadPoolExecutor | None = None
+
+    async def hash(self: Self, password: str, salt: str, algorithm: HashingAlgorithm | None = None) -> str:
+        """Hash password with provided algorithm or with the default one."""
+        hash_function = _HASH_FUNCTIONS[algorithm or self.algorithm]
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="password-hasher")
+
+        return await asyncio.get_running_loop().run_in_executor(self._executor, hash_function, password, salt)
+
+    async def verify(self: Self, password: str, salt: str, algorithm: HashingAlgorithm, expected: str) -> bool:
+        password_hash = await self.hash(password, salt, algorithm)
+        return hmac.compare_digest(password_hash, expected)
+
+    def needs_rehash(self: Self, algorithm: HashingAlgorithm) -> bool:
+        """Check whether hash made by provided algorithm should be replaced with the default one."""
+        return algorithm != self.algorithm
+
+    def shutdown(self: Self) -> None:
+        """Stop thread pool. Called on app shutdown."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+password_hasher = PasswordHasher(CONFIG.AUTH_HASHING_ALGORITHM, CONFIG.AUTH_HASHING_WORKERS)
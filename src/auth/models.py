@@ -1,18 +1,19 @@
 from __future__ import annotations
 
-import hashlib
+import secrets
 import typing
-import uuid
 from datetime import datetime
 from typing import Self
 
-from sqlalchemy import DateTime, Enum, ForeignKey, Integer, select, String
+from sqlalchemy import DateTime, Enum, event, ForeignKey, Integer, select, String
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
-from src.auth.enums import Encoding, HashingAlgorithm
+from src.auth.cache import invalidate_profile
+from src.auth.enums import HashingAlgorithm
 from src.auth.exceptions import DuplicateProfileException, ProfileNotFoundException
+from src.auth.hashing import password_hasher
 from src.auth.schemas import Credentials
 from src.shared.database import Base
 from src.shared.datetime import utcnow
@@ -47,9 +48,12 @@ class Profile(Base):
         )
         row = (await db_session.execute(query)).one_or_none()
 
-        if row is None or not row.PasswordHash.check(credentials.password):
+        if row is None or not await row.PasswordHash.check(credentials.password):
             raise ProfileNotFoundException
 
+        if password_hasher.needs_rehash(row.PasswordHash.algorithm):
+            await row.PasswordHash.rehash(db_session, credentials.password)
+
         return typing.cast(Profile, row.Profile)
 
     @classmethod
@@ -66,6 +70,11 @@ class Profile(Base):
         return new_profile
 
 
+@event.listens_for(Profile, "after_delete")
+def _invalidate_deleted_profile(_: object, __: object, target: Profile) -> None:
+    invalidate_profile(target.id)
+
+
 class PasswordHash(Base):
     __tablename__ = "password_hash"
 
@@ -78,20 +87,18 @@ class PasswordHash(Base):
 
     profile: Mapped["Profile"] = relationship(back_populates="password_hash")  # noqa: UP037
 
-    def _generate_hash(self: Self, password: str) -> str:
-        salted_input = password + self.salt
-        hash_object = hashlib.new(self.algorithm.value)
-        hash_object.update(salted_input.encode(Encoding.ASCII.value))
-        return hash_object.hexdigest()
+    async def _hash_password(self: Self, password: str) -> None:
+        self.salt = secrets.token_hex(16)
+        self.algorithm = password_hasher.algorithm
+        self.value = await password_hasher.hash(password, self.salt)
 
-    def _hash_password(self: Self, password: str) -> None:
-        self.salt = str(uuid.uuid4())
-        self.algorithm = HashingAlgorithm.SHA256
-        self.value = self._generate_hash(password)
+    async def check(self: Self, password: str) -> bool:
+        return await password_hasher.verify(password, self.salt, self.algorithm, self.value)
 
-    def check(self: Self, password: str) -> bool:
-        password_hash = self._generate_hash(password)
-        return password_hash == self.value
+    async def rehash(self: Self, db_session: AsyncSession, password: str) -> None:
+        """Replace hash made by a legacy algorithm with a hash made by the default one."""
+        await self._hash_password(password)
+        await db_session.flush()
 
     @classmethod
     async def new_object(
@@ -101,7 +108,7 @@ class PasswordHash(Base):
         profile_id: int,
     ) -> PasswordHash:
         new_password_hash = PasswordHash(profile_id=profile_id)
-        new_password_hash._hash_password(password)  # noqa: SLF001
+        await new_password_hash._hash_password(password)  # noqa: SLF001
         db_session.add(new_password_hash)
         await db_session.flush()
         return new_password_hash
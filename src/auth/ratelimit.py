@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from src.auth.exceptions import TooManyLoginAttemptsException
+from src.config import CONFIG
+from src.shared.metrics import metrics
+from src.shared.ratelimit import InMemoryRateLimiterBackend
+
+
+if TYPE_CHECKING:
+    from typing import Self
+
+    from src.shared.ratelimit import RateLimiterBackend
+
+
+class LoginRateLimiter:
+    """Throttle login attempts per profile name and per client address.
+
+    Attempts are checked before any database or hashing work, so credential stuffing bursts are rejected cheaply.
+    """
+
+    def __init__(self: Self, backend: RateLimiterBackend) -> None:
+        """Create limiter storing attempts in provided backend."""
+        self.backend = backend
+
+    async def check(self: Self, name: str, client_host: str | None) -> None:
+        """Register login attempt, raise an exception if there are too many of them."""
+        window = CONFIG.AUTH_LOGIN_RATE_WINDOW
+        if not await self.backend.hit(f"name:{name}", CONFIG.AUTH_LOGIN_RATE_LIMIT_PER_NAME, window):
+            raise TooManyLoginAttemptsException
+        if client_host and not await self.backend.hit(
+            f"host:{client_host}",
+            CONFIG.AUTH_LOGIN_RATE_LIMIT_PER_HOST,
+            window,
+        ):
+            raise TooManyLoginAttemptsException
+
+
+login_rate_limiter = LoginRateLimiter(InMemoryRateLimiterBackend(max_keys=CONFIG.AUTH_LOGIN_RATE_MAX_KEYS))
+
+metrics.register("login_rate_limiter", login_rate_limiter.backend.collect_metrics)
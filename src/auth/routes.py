@@ -2,13 +2,13 @@ from __future__ import annotations
 
 from typing import Annotated
 
-from fastapi import APIRouter, Body, Depends, status
+from fastapi import APIRouter, Body, Depends, Request, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.auth import controllers
 from src.auth.dependencies import get_token
 from src.auth.schemas import Credentials, ProfileData, Token, TokenPayload
-from src.shared.database import get_session
+from src.shared.database import get_read_session, get_session
 from src.shared.exc_responses import responses
 
 
@@ -38,15 +38,18 @@ async def register(
     responses={
         status.HTTP_201_CREATED: {"description": "Login - bearer token is created."},
         status.HTTP_404_NOT_FOUND: responses[status.HTTP_404_NOT_FOUND],
+        status.HTTP_429_TOO_MANY_REQUESTS: responses[status.HTTP_429_TOO_MANY_REQUESTS],
     },
     response_model=Token,
     status_code=status.HTTP_201_CREATED,
 )
 async def login(
+    request: Request,
     credentials: Annotated[Credentials, Body()],
     db_session: AsyncSession = Depends(get_session),
 ) -> Token:
-    return await controllers.login(credentials, db_session)
+    client_host = request.client.host if request.client else None
+    return await controllers.login(credentials, db_session, client_host)
 
 
 @router.get(
@@ -61,7 +64,7 @@ async def login(
     status_code=status.HTTP_200_OK,
 )
 async def get_profile(
-    db_session: AsyncSession = Depends(get_session),
+    db_session: AsyncSession = Depends(get_read_session),
     token: TokenPayload = Depends(get_token),
 ) -> ProfileData:
     return await controllers.get_profile(db_session, token)
@@ -1,11 +1,13 @@
 from __future__ import annotations
 
+import hashlib
 from datetime import datetime, timedelta
 from typing import Self
 
 import jwt
 from pydantic import BaseModel, Field
 
+from src.auth.cache import token_cache
 from src.auth.enums import SignatureAlgorithm
 from src.auth.exceptions import ExpiredTokenException
 from src.config import CONFIG
@@ -41,13 +43,25 @@ class TokenPayload(BaseModel):
 
     @classmethod
     def from_token(cls: type[TokenPayload], token: str) -> TokenPayload:
-        """Decode JWT token into a class instance."""
+        """Decode JWT token into a class instance.
+
+        Token is verified only once, validated payload is cached until token expires.
+        """
+        digest = hashlib.sha256(token.encode()).digest()
+        payload = token_cache.get(digest)
+        if payload is not None:
+            return payload
+
         try:
             payload_dict = jwt.decode(token, CONFIG.SECRET_KEY, algorithms=[SignatureAlgorithm.HS256.value])
         except jwt.ExpiredSignatureError:
             raise ExpiredTokenException from None
 
-        return TokenPayload.model_validate(payload_dict)
+        payload = TokenPayload.model_validate(payload_dict)
+        if "exp" in payload_dict:
+            token_cache.set(digest, payload, expires_at=payload_dict["exp"])
+
+        return payload
 
     @property
     def token(self: Self) -> str:
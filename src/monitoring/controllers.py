@@ -0,0 +1,13 @@
+from __future__ import annotations
+
+from src.monitoring.schemas import Health, Metrics
+from src.shared.health import readiness
+from src.shared.metrics import metrics
+
+
+async def get_metrics() -> Metrics:
+    return Metrics(metrics=metrics.collect())
+
+
+async def get_health() -> Health:
+    return Health(ready=readiness.ready, pending=readiness.pending)
@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+from fastapi import APIRouter, Response, status
+
+from src.monitoring import controllers
+from src.monitoring.schemas import Health, Metrics
+
+
+router = APIRouter(tags=["monitoring"])
+
+
+@router.get(
+    "/metrics",
+    description="Get in-process metrics of current app worker.",
+    responses={
+        status.HTTP_200_OK: {"description": "Current values of counters and gauges are returned."},
+    },
+    response_model=Metrics,
+    status_code=status.HTTP_200_OK,
+)
+async def get_metrics() -> Metrics:
+    return await controllers.get_metrics()
+
+
+@router.get(
+    "/health",
+    description="Get readiness of current app worker, e.g. for load balancer or orchestrator probes.",
+    responses={
+        status.HTTP_200_OK: {"description": "App worker is ready to serve requests."},
+        status.HTTP_503_SERVICE_UNAVAILABLE: {
+            "description": "App worker is still starting, e.g. its caches are being warmed up.",
+            "model": Health,
+        },
+    },
+    response_model=Health,
+    status_code=status.HTTP_200_OK,
+)
+async def get_health(response: Response) -> Health:
+    health = await controllers.get_health()
+    if not health.ready:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    return health
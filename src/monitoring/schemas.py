@@ -0,0 +1,16 @@
+from __future__ import annotations
+
+from pydantic import BaseModel, Field
+
+
+class Metrics(BaseModel):
+    """In-process metrics grouped by component."""
+
+    metrics: dict[str, dict[str, float]]
+
+
+class Health(BaseModel):
+    """Readiness of current app worker."""
+
+    ready: bool
+    pending: list[str] = Field(description="Components which app worker still waits for.", examples=[["cache_warmup"]])
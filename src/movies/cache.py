@@ -0,0 +1,25 @@
+from __future__ import annotations
+
+from src.config import CONFIG
+from src.shared.cache import TTLCache
+from src.shared.metrics import metrics
+
+
+# in-process tier of movie data lookups, `movie` table is the next tier and the upstream is the last one,
+# data is kept encoded as JSON to be sent in responses as is and is put here only once it is committed to the table
+movie_cache: TTLCache[int, bytes] = TTLCache(
+    max_items=CONFIG.MOVIE_CACHE_SIZE,
+    ttl=CONFIG.MOVIE_CACHE_TTL,
+    stale_ttl=CONFIG.MOVIE_CACHE_STALE_TTL,
+)
+
+# encoded keyword search results keyed by normalized keyword, bounded by their size
+search_cache: TTLCache[str, bytes] = TTLCache(
+    max_items=CONFIG.SEARCH_CACHE_SIZE,
+    max_bytes=CONFIG.SEARCH_CACHE_MAX_BYTES,
+    ttl=CONFIG.SEARCH_CACHE_TTL,
+    stale_ttl=CONFIG.SEARCH_CACHE_STALE_TTL,
+)
+
+metrics.register("movie_cache", movie_cache.collect_metrics)
+metrics.register("search_cache", search_cache.collect_metrics)
@@ -1,66 +1,285 @@
 from __future__ import annotations
 
+import asyncio
+import contextlib
+from functools import partial
 from typing import TYPE_CHECKING
 
-import aiohttp
+import orjson
 
-from src.movies.enums import KPResponse
-from src.movies.exceptions import FavoriteNotFoundException
-from src.movies.models import Favorite, Movie
-from src.movies.schemas import MovieData, Movies
-from src.movies.utlis import headers, kinopoisk_unoff_base_url
-from src.shared.exceptions import BadGatewayException, InternalServerError
+from src.config import CONFIG
+from src.movies.cache import movie_cache, search_cache
+from src.movies.enums import BatchItemStatus, FavoritesView
+from src.movies.kinopoisk import kinopoisk_client
+from src.movies.models import EXACT_TITLE_SCORE, Favorite, Movie
+from src.movies.schemas import BatchItemResult, BatchResults, MovieSummaries
+from src.movies.utlis import normalize_keyword
+from src.shared.database import async_session_factory, mark_written, on_commit, release_connection
+from src.shared.exceptions import HTTPException
+from src.shared.ratelimit import RequestPriority
+from src.shared.responses import RawJSONResponse
 
 
 if TYPE_CHECKING:
+    from collections.abc import AsyncIterator
+
     from sqlalchemy.ext.asyncio import AsyncSession
 
     from src.auth.schemas import TokenPayload
     from src.movies.schemas import Movie as MovieSchema
+    from src.movies.schemas import MovieIds
 
 
-async def get_favorites(db_session: AsyncSession, token: TokenPayload) -> Movies:
-    movies = await Favorite.get_all(db_session, token.profile_id)
+# references to running background tasks, so they aren't garbage collected before completion
+_background_tasks: set[asyncio.Task[None]] = set()
 
-    return Movies(movies=movies)
 
+def _movie_data(data: bytes) -> bytes:
+    # same document as `MovieData` schema, built around already encoded data
+    return b'{"data":' + data + b"}"
 
-async def add_favourite(movie: MovieSchema, db_session: AsyncSession, token: TokenPayload) -> MovieData:
-    movie_obj = await Movie.get(db_session=db_session, movie_id=movie.id)
-    if not movie_obj:
-        data = (await movie_search_by_id(movie.id)).data
-        movie_obj = await Movie.add(db_session=db_session, data=data)
 
-    await Favorite.add(db_session, movie_obj.id, token.profile_id)
-    return MovieData(data=movie_obj.data)
+async def get_favorites(
+    db_session: AsyncSession,
+    token: TokenPayload,
+    limit: int,
+    cursor: int | None,
+    view: FavoritesView,
+) -> RawJSONResponse | MovieSummaries:
+    if view == FavoritesView.SUMMARY:
+        summaries, next_cursor = await Favorite.get_all_summaries(db_session, token.profile_id, limit, cursor)
+        return MovieSummaries(movies=summaries, next_cursor=next_cursor)
 
+    # same document as `Movies` schema, movies data is passed from the DB as is
+    movies, next_cursor = await Favorite.get_all(db_session, token.profile_id, limit, cursor)
+    content = b'{"movies":[' + b",".join(_movie_data(data) for data in movies) + b'],"next_cursor":'
+    content += orjson.dumps(next_cursor) + b"}"
+    return RawJSONResponse(content)
 
-async def movie_search_by_keyword(keyword: str) -> MovieData:
-    async with aiohttp.ClientSession(headers=headers) as session:  # noqa: SIM117
-        async with session.get(
-            kinopoisk_unoff_base_url + "/v2.1/films/search-by-keyword",
-            params={"keyword": keyword},
-        ) as resp:
-            if resp.status == KPResponse.UNATHORIZED.value:
-                raise BadGatewayException
-            if resp.status != KPResponse.OK.value:
-                raise InternalServerError
-            return MovieData(data=await resp.json())
 
+async def export_favorites(token: TokenPayload) -> AsyncIterator[bytes]:
+    """Yield current user's favorite movies data as NDJSON lines."""
+    # response is streamed after request's dependencies are finalized,
+    # so the stream needs its own session instead of the request's one
+    async with async_session_factory() as db_session:
+        async for data in Favorite.stream_all(db_session, token.profile_id, CONFIG.FAVORITES_STREAM_BATCH_SIZE):
+            yield _movie_data(data) + b"\n"
 
-async def movie_search_by_id(kinopoisk_id: int) -> MovieData:
-    async with aiohttp.ClientSession(headers=headers) as session:  # noqa: SIM117
-        async with session.get(f"{kinopoisk_unoff_base_url}/v2.2/films/{kinopoisk_id}") as resp:
-            if resp.status == KPResponse.UNATHORIZED.value:
-                raise BadGatewayException
-            if resp.status != KPResponse.OK.value:
-                raise InternalServerError
-            return MovieData(data=await resp.json())
 
+async def add_favourite(movie: MovieSchema, db_session: AsyncSession, token: TokenPayload) -> RawJSONResponse:
+    # movie fetched from the upstream is saved together with favorite by a single statement
+    data, saved = await get_movie_data(db_session, movie.id, persist=False)
 
-async def remove_favorite(kinopoisk_id: int, db_session: AsyncSession, token: TokenPayload) -> None:
-    fav = await Favorite.get(db_session, kinopoisk_id, token.profile_id)
-    if not fav:
-        raise FavoriteNotFoundException
+    await Favorite.add(db_session, movie.id, None if saved else data, token.profile_id)
+    mark_written(token.profile_id)
+    if not saved:
+        on_commit(db_session, partial(movie_cache.set, movie.id, data))
+    return RawJSONResponse(_movie_data(data))
+
+
+async def get_movie_data(
+    db_session: AsyncSession,
+    kinopoisk_id: int,
+    *,
+    persist: bool = True,
+) -> tuple[bytes, bool]:
+    """Get movie data encoded as JSON from in-process cache, then from `movie` table and only then from the upstream.
+
+    Data fetched from the upstream is saved to `movie` table unless `persist` is false.
+    Return data and whether it is saved in `movie` table.
+    """
+    data = movie_cache.get(kinopoisk_id)
+    if data is not None:
+        return data, True
+
+    data = await Movie.get_data(db_session=db_session, movie_id=kinopoisk_id)
+    if data is not None:
+        movie_cache.set(kinopoisk_id, data)
+        return data, True
+
+    # connection isn't needed while waiting for the upstream
+    await release_connection(db_session)
+    data = await fetch_movie_data(kinopoisk_id)
+    if not persist:
+        return data, False
+
+    await Movie.add(db_session=db_session, movie_id=kinopoisk_id, data=data)
+    on_commit(db_session, partial(movie_cache.set, kinopoisk_id, data))
+    return data, True
+
+
+async def fetch_movie_data(kinopoisk_id: int) -> bytes:
+    """Get movie data from the upstream encoded as JSON.
+
+    Data isn't put into in-process cache, it is done by the caller once data is committed to `movie` table.
+    """
+    try:
+        return orjson.dumps(await kinopoisk_client.get(f"/v2.2/films/{kinopoisk_id}"))
+    except HTTPException:
+        # stale data is better than an error when the upstream is unavailable
+        stale_data = movie_cache.get_stale(kinopoisk_id)
+        if stale_data is None:
+            raise
+        return stale_data
+
+
+async def add_favorites(movies: MovieIds, db_session: AsyncSession, token: TokenPayload) -> BatchResults:
+    movie_ids = list(dict.fromkeys(movies.ids))
+    existing_ids = await Movie.get_existing_ids(db_session, movie_ids)
+
+    missing_ids = [movie_id for movie_id in movie_ids if movie_id not in existing_ids]
+    movies_data: dict[int, bytes] = {}
+    failed_ids: set[int] = set()
+    if missing_ids:
+        # connection isn't needed while waiting for the upstream
+        await release_connection(db_session)
+        movies_data, failed_ids = await fetch_movies_data(missing_ids)
+
+    added_ids: set[int] = set()
+    addable_ids = [movie_id for movie_id in movie_ids if movie_id not in failed_ids]
+    if addable_ids:
+        added_ids = await Favorite.add_many(db_session, addable_ids, token.profile_id, movies_data)
+        mark_written(token.profile_id)
+        for movie_id, data in movies_data.items():
+            on_commit(db_session, partial(movie_cache.set, movie_id, data))
+
+    results = []
+    for movie_id in movie_ids:
+        if movie_id in failed_ids:
+            item_status = BatchItemStatus.FAILED
+        elif movie_id in added_ids:
+            item_status = BatchItemStatus.ADDED
+        else:
+            item_status = BatchItemStatus.ALREADY_EXISTS
+        results.append(BatchItemResult(id=movie_id, status=item_status))
+
+    return BatchResults(results=results)
+
+
+async def fetch_movies_data(movie_ids: list[int]) -> tuple[dict[int, bytes], set[int]]:
+    """Get data of several movies from in-process cache or the upstream.
+
+    Return data of found movies keyed by movie id and ids of movies which could not be fetched.
+    """
+    # movies are requested concurrently but with a bounded fan-out
+    semaphore = asyncio.Semaphore(CONFIG.FAVORITES_BATCH_CONCURRENCY)
+
+    async def get_one(kinopoisk_id: int) -> bytes:
+        data = movie_cache.get(kinopoisk_id)
+        if data is not None:
+            return data
+        async with semaphore:
+            return await fetch_movie_data(kinopoisk_id)
+
+    fetched = await asyncio.gather(*(get_one(movie_id) for movie_id in movie_ids), return_exceptions=True)
+
+    movies_data = {}
+    failed_ids = set()
+    for movie_id, result in zip(movie_ids, fetched, strict=True):
+        # upstream errors are reported per movie, any other error fails the whole batch
+        if isinstance(result, HTTPException):
+            failed_ids.add(movie_id)
+        elif isinstance(result, BaseException):
+            raise result
+        else:
+            movies_data[movie_id] = result
 
-    await fav.remove(db_session, kinopoisk_id, token.profile_id)
+    return movies_data, failed_ids
+
+
+async def remove_favorites(movies: MovieIds, db_session: AsyncSession, token: TokenPayload) -> BatchResults:
+    movie_ids = list(dict.fromkeys(movies.ids))
+    removed_ids = await Favorite.remove_many(db_session, movie_ids, token.profile_id)
+    mark_written(token.profile_id)
+
+    return BatchResults(
+        results=[
+            BatchItemResult(
+                id=movie_id,
+                status=BatchItemStatus.REMOVED if movie_id in removed_ids else BatchItemStatus.NOT_FOUND,
+            )
+            for movie_id in movie_ids
+        ],
+    )
+
+
+async def movie_search_by_keyword(keyword: str, db_session: AsyncSession) -> RawJSONResponse:
+    keyword = normalize_keyword(keyword)
+    data = search_cache.get(keyword)
+    if data is None and CONFIG.SEARCH_LOCAL_ENABLED:
+        data = await search_locally(db_session, keyword)
+        if data is not None:
+            # local results may miss movies which aren't saved yet and their totals count only saved ones,
+            # so they are cached shortly and replaced by complete results requested from the upstream in background
+            search_cache.set(keyword, data, ttl=CONFIG.SEARCH_LOCAL_CACHE_TTL, size=len(data))
+            _complete_search_results(keyword)
+    if data is None:
+        # connection isn't needed while waiting for the upstream
+        await release_connection(db_session)
+        try:
+            data = await fetch_search_results(keyword)
+        except HTTPException:
+            # stale results are better than an error when the upstream is unavailable
+            data = search_cache.get_stale(keyword)
+            if data is None:
+                raise
+
+    return RawJSONResponse(_movie_data(data))
+
+
+async def search_locally(db_session: AsyncSession, keyword: str) -> bytes | None:
+    """Search saved movies by normalized keyword, return None if results are not good enough to skip the upstream.
+
+    Results are good enough only if some saved movie is titled exactly as the keyword
+    and there are at least `SEARCH_LOCAL_MIN_RESULTS` of them, e.g. a saved sequel alone doesn't mean
+    that all movies of the series are saved. Results are encoded in the format of upstream keyword search results,
+    their totals count only the found saved movies.
+    """
+    results = await Movie.search(db_session, keyword, CONFIG.SEARCH_LOCAL_MIN_SCORE, CONFIG.SEARCH_LOCAL_LIMIT)
+    # the best result goes first
+    if len(results) < CONFIG.SEARCH_LOCAL_MIN_RESULTS or results[0][1] < EXACT_TITLE_SCORE:
+        return None
+
+    films = [film for film, _ in results]
+
+    return (
+        b'{"keyword":' + orjson.dumps(keyword)
+        + b',"pagesCount":1,"searchFilmsCountResult":' + str(len(films)).encode()
+        + b',"films":[' + b",".join(films) + b"]}"
+    )
+
+
+async def fetch_search_results(keyword: str, priority: RequestPriority = RequestPriority.USER) -> bytes:
+    """Get results of search by normalized keyword from the upstream and put them into in-process cache."""
+    results = await kinopoisk_client.get(
+        "/v2.1/films/search-by-keyword",
+        params={"keyword": keyword},
+        priority=priority,
+    )
+
+    # empty results are cached for a short time only since such movies may appear soon
+    ttl = CONFIG.SEARCH_CACHE_TTL if results.get("films") else CONFIG.SEARCH_CACHE_NEGATIVE_TTL
+    data = orjson.dumps(results)
+    search_cache.set(keyword, data, ttl=ttl, size=len(data))
+    return data
+
+
+def _complete_search_results(keyword: str) -> None:
+    async def complete() -> None:
+        # local results are served until they expire if the upstream can't spare capacity now
+        with contextlib.suppress(HTTPException):
+            await fetch_search_results(keyword, RequestPriority.BACKGROUND)
+
+    task = asyncio.create_task(complete())
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+
+
+async def movie_search_by_id(kinopoisk_id: int, db_session: AsyncSession) -> RawJSONResponse:
+    data, _ = await get_movie_data(db_session, kinopoisk_id)
+    return RawJSONResponse(_movie_data(data))
+
+
+async def remove_favorite(kinopoisk_id: int, db_session: AsyncSession, token: TokenPayload) -> None:
+    await Favorite.remove(db_session, kinopoisk_id, token.profile_id)
+    mark_written(token.profile_id)
@@ -6,3 +6,19 @@ from enum import Enum
 class KPResponse(Enum):
     OK = 200
     UNATHORIZED = 401
+    PAYMENT_REQUIRED = 402
+    TOO_MANY_REQUESTS = 429
+    SERVER_ERROR = 500
+
+
+class FavoritesView(Enum):
+    FULL = "full"
+    SUMMARY = "summary"
+
+
+class BatchItemStatus(Enum):
+    ADDED = "added"
+    ALREADY_EXISTS = "already_exists"
+    REMOVED = "removed"
+    NOT_FOUND = "not_found"
+    FAILED = "failed"
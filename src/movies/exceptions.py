@@ -2,7 +2,12 @@ from __future__ import annotations
 
 from fastapi import status
 
-from src.shared.exceptions import BadRequestException, NotFoundException
+from src.shared.exceptions import (
+    BadGatewayException,
+    BadRequestException,
+    NotFoundException,
+    TooManyRequestsException,
+)
 
 
 class FavoriteAlreadyExistsException(BadRequestException):
@@ -19,3 +24,15 @@ class FavoriteNotFoundException(NotFoundException):
     description = "Request is not correct."
     details = "Could not find favorite relation with provided data."
     status_code = status.HTTP_400_BAD_REQUEST
+
+
+class KinopoiskUnavailableException(BadGatewayException):
+    description = "Unofficial Kinopoisk API is unavailable."
+    details = "Upstream server is down, overloaded or too slow, please try again later."
+    status_code = status.HTTP_502_BAD_GATEWAY
+
+
+class KinopoiskThrottledException(TooManyRequestsException):
+    description = "Too many requests to Unofficial Kinopoisk API."
+    details = "Request rate limit or daily quota of Unofficial Kinopoisk API is exceeded, please try again later."
+    status_code = status.HTTP_429_TOO_MANY_REQUESTS
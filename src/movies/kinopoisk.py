@@ -0,0 +1,162 @@
+from __future__ import annotations
+
+from dataclasses import asdict
+from typing import TYPE_CHECKING
+
+import aiohttp
+import orjson
+
+from src.config import CONFIG
+from src.movies.enums import KPResponse
+from src.movies.exceptions import KinopoiskThrottledException, KinopoiskUnavailableException
+from src.movies.utlis import api_key_header, api_keys, headers, kinopoisk_unoff_base_url
+from src.shared.exceptions import BadGatewayException, InternalServerError
+from src.shared.metrics import metrics
+from src.shared.ratelimit import QuotaExceededError, RateLimitedError, RequestPriority, UpstreamLimiter
+from src.shared.resilience import CircuitBreaker, CircuitOpenError, ResiliencePolicy, RetryBudget
+from src.shared.singleflight import SingleFlight
+
+
+if TYPE_CHECKING:
+    from typing import Any, Self
+
+
+class KinopoiskClient:
+    """Shared HTTP client for Unofficial Kinopoisk API.
+
+    Keeps a single pooled `aiohttp.ClientSession` so that upstream calls reuse
+    keep-alive connections instead of doing a new TCP+TLS handshake per request.
+    Requests are made through resilience policy, so upstream hiccups are retried
+    and calls fail fast while the upstream is down.
+    Calls are admitted by client-side limiter, so API keys' rate limits and quotas are not exceeded.
+    """
+
+    def __init__(
+        self: Self,
+        policy: ResiliencePolicy[Any],
+        limiter: UpstreamLimiter,
+        base_url: str = kinopoisk_unoff_base_url,
+    ) -> None:
+        """Initialize client without opening a session."""
+        self.base_url = base_url
+        self.policy = policy
+        self.limiter = limiter
+        # concurrent identical requests are sent to the upstream only once, requests of different priorities
+        # aren't coalesced, so user ones don't wait for tokens and aren't shed like background ones
+        self.flights: SingleFlight[tuple[str, tuple[tuple[str, str], ...], RequestPriority], Any] = SingleFlight()
+        self._session: aiohttp.ClientSession | None = None
+
+    async def start(self: Self) -> None:
+        """Open pooled client session. Called on app startup."""
+        if self._session is not None and not self._session.closed:
+            return
+
+        connector = aiohttp.TCPConnector(
+            limit=CONFIG.KP_POOL_LIMIT,
+            limit_per_host=CONFIG.KP_POOL_LIMIT_PER_HOST,
+            keepalive_timeout=CONFIG.KP_KEEPALIVE_TIMEOUT,
+            ttl_dns_cache=CONFIG.KP_DNS_CACHE_TTL,
+            use_dns_cache=True,
+        )
+        timeout = aiohttp.ClientTimeout(total=CONFIG.KP_TOTAL_TIMEOUT, connect=CONFIG.KP_CONNECT_TIMEOUT)
+        self._session = aiohttp.ClientSession(connector=connector, headers=headers, timeout=timeout)
+
+    async def close(self: Self) -> None:
+        """Close pooled client session. Called on app shutdown."""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def get(
+        self: Self,
+        path: str,
+        params: dict[str, str] | None = None,
+        priority: RequestPriority = RequestPriority.USER,
+    ) -> Any:  # noqa: ANN401
+        """Send GET request to the upstream and return decoded JSON body.
+
+        Returned data is shared between coalesced callers and must not be mutated.
+        """
+        key = (path, tuple(sorted(params.items())) if params else (), priority)
+        return await self.flights.do(key, lambda: self._call(path, params, priority))
+
+    async def _call(self: Self, path: str, params: dict[str, str] | None, priority: RequestPriority) -> Any:  # noqa: ANN401
+        try:
+            return await self.policy.call(lambda: self._get(path, params, priority))
+        except (CircuitOpenError, TimeoutError):
+            raise KinopoiskUnavailableException from None
+
+    async def _get(self: Self, path: str, params: dict[str, str] | None, priority: RequestPriority) -> Any:  # noqa: ANN401
+        # each attempt takes its own token, so retries and hedges are limited as well,
+        # and a retry of throttled request is sent with another key or waits until the drained key is refilled
+        try:
+            api_key = await self.limiter.acquire(priority)
+        except (RateLimitedError, QuotaExceededError):
+            raise KinopoiskThrottledException from None
+
+        # session is opened lazily as well, e.g. when app runs without lifespan events in tests
+        if self._session is None or self._session.closed:
+            await self.start()
+        assert self._session is not None
+
+        request_headers = {api_key_header: api_key}
+        try:
+            async with self._session.get(self.base_url + path, params=params, headers=request_headers) as resp:
+                if resp.status == KPResponse.UNATHORIZED.value:
+                    raise BadGatewayException
+                if resp.status == KPResponse.PAYMENT_REQUIRED.value:
+                    # daily quota of the key is exceeded, other keys are used till the end of the day
+                    self.limiter.exhaust(api_key)
+                    raise KinopoiskThrottledException
+                if resp.status == KPResponse.TOO_MANY_REQUESTS.value:
+                    self.limiter.drain(api_key)
+                # throttled and failed requests may succeed on retry
+                if resp.status == KPResponse.TOO_MANY_REQUESTS.value or resp.status >= KPResponse.SERVER_ERROR.value:
+                    raise KinopoiskUnavailableException
+                if resp.status != KPResponse.OK.value:
+                    raise InternalServerError
+                return await resp.json(loads=orjson.loads)
+        except aiohttp.ClientConnectorError:
+            # connection hasn't been established, so request hasn't been sent and hasn't used the quota
+            self.limiter.release(api_key)
+            raise KinopoiskUnavailableException from None
+        except aiohttp.ClientError:
+            raise KinopoiskUnavailableException from None
+
+
+kinopoisk_client = KinopoiskClient(
+    ResiliencePolicy(
+        attempt_timeout=CONFIG.KP_ATTEMPT_TIMEOUT,
+        deadline=CONFIG.KP_DEADLINE,
+        max_attempts=CONFIG.KP_MAX_ATTEMPTS,
+        backoff_base=CONFIG.KP_RETRY_BACKOFF_BASE,
+        backoff_max=CONFIG.KP_RETRY_BACKOFF_MAX,
+        budget=RetryBudget(
+            ratio=CONFIG.KP_RETRY_BUDGET_RATIO,
+            min_per_second=CONFIG.KP_RETRY_BUDGET_MIN_PER_SECOND,
+            capacity=CONFIG.KP_RETRY_BUDGET_CAPACITY,
+        ),
+        breaker=CircuitBreaker(
+            failure_threshold=CONFIG.KP_BREAKER_FAILURE_THRESHOLD,
+            recovery_timeout=CONFIG.KP_BREAKER_RECOVERY_TIMEOUT,
+        ),
+        # only unavailability is worth retrying, other errors will be the same on retry
+        is_transient=lambda error: isinstance(error, KinopoiskUnavailableException),
+        hedge_delay=CONFIG.KP_HEDGE_DELAY,
+    ),
+    UpstreamLimiter(
+        keys=api_keys,
+        rate=CONFIG.KP_RATE_LIMIT,
+        burst=CONFIG.KP_RATE_BURST,
+        daily_quota=CONFIG.KP_DAILY_QUOTA,
+        background_reserve=CONFIG.KP_BACKGROUND_QUOTA_RESERVE,
+        max_wait=CONFIG.KP_QUEUE_TIMEOUT,
+    ),
+)
+
+metrics.register(
+    "kinopoisk_single_flight",
+    lambda: {**asdict(kinopoisk_client.flights.stats), "in_flight": kinopoisk_client.flights.in_flight},
+)
+metrics.register("kinopoisk_resilience", kinopoisk_client.policy.collect_metrics)
+metrics.register("kinopoisk_limiter", kinopoisk_client.limiter.collect_metrics)
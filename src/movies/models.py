@@ -1,40 +1,237 @@
 from __future__ import annotations
 
-import json
-from typing import Any, cast, Self
+from collections.abc import AsyncIterator, Sequence
+from datetime import datetime
+from typing import Any, TYPE_CHECKING
 
-from sqlalchemy import delete, ForeignKey, Integer, select, String, UniqueConstraint
-from sqlalchemy.exc import IntegrityError
+from sqlalchemy import (
+    any_,
+    bindparam,
+    case,
+    ColumnElement,
+    Computed,
+    DateTime,
+    delete,
+    ForeignKey,
+    func,
+    Index,
+    Integer,
+    literal,
+    or_,
+    Row,
+    select,
+    Text,
+    UniqueConstraint,
+    update,
+)
+from sqlalchemy.dialects.postgresql import ARRAY, insert, JSONB, TSVECTOR
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Mapped, mapped_column
 
-from src.movies.exceptions import FavoriteAlreadyExistsException
-from src.movies.schemas import MovieData
+from src.movies.exceptions import FavoriteAlreadyExistsException, FavoriteNotFoundException
+from src.movies.schemas import MovieSummary
 from src.shared.database import Base
 
 
+if TYPE_CHECKING:
+    from typing import Final
+
+
+# score of local search results whose title is exactly the keyword
+EXACT_TITLE_SCORE: Final = 1.0
+
+# movie titles in all languages, local search is done by them
+_SEARCH_TITLE = (
+    "lower(coalesce(data ->> 'nameRu', '') || ' ' || coalesce(data ->> 'nameEn', '') || ' ' "
+    "|| coalesce(data ->> 'nameOriginal', ''))"
+)
+
+
+def _jsonb(data: bytes) -> ColumnElement[Any]:
+    # data is already encoded, so it is passed as text and cast by the DB instead of being serialized once again
+    return literal(data.decode(), Text).cast(JSONB)
+
+
 class Movie(Base):
     __tablename__ = "movie"
 
     id: Mapped[int] = mapped_column(Integer(), primary_key=True, autoincrement=False)
 
-    data: Mapped[str] = mapped_column(String)
+    data: Mapped[Any] = mapped_column(JSONB)
+    fetched_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    # search columns are generated by the DB from movie data, so they are kept up to date on insert and refresh,
+    # "simple" configuration is used since titles are both russian and english
+    search_title: Mapped[str] = mapped_column(Text, Computed(_SEARCH_TITLE, persisted=True), deferred=True)
+    search_vector: Mapped[Any] = mapped_column(
+        TSVECTOR,
+        Computed(f"to_tsvector('simple', {_SEARCH_TITLE})", persisted=True),
+        deferred=True,
+    )
+
+    __table_args__ = (
+        # supports lookup of stale movies to refresh
+        Index("ix_movie_fetched_at", "fetched_at"),
+        # support full-text and trigram search by titles
+        Index("ix_movie_search_vector", "search_vector", postgresql_using="gin"),
+        Index(
+            "ix_movie_search_title_trgm",
+            "search_title",
+            postgresql_using="gin",
+            postgresql_ops={"search_title": "gin_trgm_ops"},
+        ),
+    )
 
     @classmethod
-    async def add(cls: type[Movie], db_session: AsyncSession, data: dict[Any, Any]) -> Movie:
-        new_movie = Movie(id=data["kinopoiskId"], data=json.dumps(data, ensure_ascii=False))
-        db_session.add(new_movie)
-        await db_session.flush()
-        return new_movie
+    async def add(cls: type[Movie], db_session: AsyncSession, movie_id: int, data: bytes) -> None:
+        # concurrent requests may fetch the same movie, the first one to insert it wins
+        query = (
+            insert(Movie)
+            .values(id=movie_id, data=_jsonb(data))
+            .on_conflict_do_nothing(index_elements=[Movie.id])
+        )
+        await db_session.execute(query)
 
     @classmethod
-    async def get(cls: type[Movie], db_session: AsyncSession, movie_id: int) -> Movie | None:
-        query = select(Movie).where(Movie.id == movie_id)
-        row = (await db_session.execute(query)).one_or_none()
-        if not row:
-            return None
+    async def get_data(cls: type[Movie], db_session: AsyncSession, movie_id: int) -> bytes | None:
+        """Get movie data encoded as JSON by the DB, so it is not decoded just to be encoded back for a response."""
+        query = select(Movie.data.cast(Text)).where(Movie.id == movie_id)
+        data = (await db_session.execute(query)).scalar_one_or_none()
+        return data.encode() if data is not None else None
 
-        return cast(Movie, row.Movie)
+    @classmethod
+    async def search(
+        cls: type[Movie],
+        db_session: AsyncSession,
+        keyword: str,
+        min_score: float,
+        limit: int,
+    ) -> list[tuple[bytes, float]]:
+        """Search movies by normalized keyword in their titles and return them with their scores, best ones first.
+
+        Movie matches keyword with score `EXACT_TITLE_SCORE` if one of its titles is the keyword,
+        with score 0.9 if its titles contain all keyword's words, otherwise score is trigram similarity
+        of keyword and the most similar part of titles capped at 0.9. Only movies matching with at least
+        `min_score` are returned.
+
+        Each movie is encoded as JSON by the DB in the format of upstream keyword search results:
+        year and rating are strings and film length is formatted as "H:MM" as well,
+        but description is movie's short description and not its countries and director.
+        """
+        exact_title = or_(
+            *(func.lower(Movie.data[title].as_string()) == keyword for title in ("nameRu", "nameEn", "nameOriginal")),
+        )
+        full_text_match = Movie.search_vector.match(keyword, postgresql_regconfig="simple")
+        score = case(
+            (exact_title, EXACT_TITLE_SCORE),
+            (full_text_match, 0.9),
+            else_=func.least(func.word_similarity(keyword, Movie.search_title), 0.9),
+        )
+        length = Movie.data["filmLength"].as_integer()
+        film = func.jsonb_build_object(
+            "filmId", Movie.id,
+            "nameRu", Movie.data["nameRu"],
+            "nameEn", func.coalesce(Movie.data["nameEn"], Movie.data["nameOriginal"]),
+            "type", Movie.data["type"],
+            "year", Movie.data["year"].as_string(),
+            "description", Movie.data["shortDescription"],
+            # null length gives null
+            "filmLength", (length // 60).cast(Text).concat(":").concat(func.lpad((length % 60).cast(Text), 2, "0")),
+            "countries", Movie.data["countries"],
+            "genres", Movie.data["genres"],
+            "rating", Movie.data["ratingKinopoisk"].as_string(),
+            "ratingVoteCount", Movie.data["ratingKinopoiskVoteCount"],
+            "posterUrl", Movie.data["posterUrl"],
+            "posterUrlPreview", Movie.data["posterUrlPreview"],
+        )
+        query = (
+            select(film.cast(Text), score)
+            # both conditions are supported by indexes, score is only checked for rows found by them
+            .where(
+                or_(full_text_match, literal(keyword, Text).bool_op("<%")(Movie.search_title)),
+                score >= min_score,
+            )
+            .order_by(score.desc(), Movie.data["ratingKinopoiskVoteCount"].as_integer().desc().nulls_last())
+            .limit(limit)
+        )
+        return [(film.encode(), score) for film, score in (await db_session.execute(query)).all()]
+
+    @classmethod
+    async def get_most_favorited_data(cls: type[Movie], db_session: AsyncSession, limit: int) -> dict[int, bytes]:
+        """Get data encoded as JSON of movies which are in favorites of most profiles."""
+        favorites_count = (
+            select(Favorite.movie_id, func.count().label("count"))
+            .group_by(Favorite.movie_id)
+            .order_by(func.count().desc())
+            .limit(limit)
+            .subquery()
+        )
+        query = (
+            select(Movie.id, Movie.data.cast(Text).label("data"))
+            .join(favorites_count, favorites_count.c.movie_id == Movie.id)
+            .order_by(favorites_count.c.count.desc())
+        )
+        return {row.id: row.data.encode() for row in (await db_session.execute(query)).all()}
+
+    @classmethod
+    async def claim_stale_ids(
+        cls: type[Movie],
+        db_session: AsyncSession,
+        fetched_before: datetime,
+        claimed_until: datetime,
+        limit: int,
+    ) -> list[int]:
+        """Claim movies fetched before provided time for refreshing, most favorited ones first, and return their ids.
+
+        Claimed movies are marked as fetched at `claimed_until`, so concurrent workers don't take them
+        until they are refreshed or the claim expires, e.g. if the worker has stopped.
+        """
+        stale = (
+            select(Movie.id)
+            .outerjoin(Favorite, Favorite.movie_id == Movie.id)
+            .where(Movie.fetched_at < fetched_before)
+            .group_by(Movie.id)
+            .order_by(func.count(Favorite.id).desc(), Movie.fetched_at)
+            .limit(limit)
+            .subquery()
+        )
+        # movies locked by a concurrent claim are skipped, staleness is rechecked on the locked row
+        claimed = (
+            select(Movie.id)
+            .where(Movie.id.in_(select(stale.c.id)), Movie.fetched_at < fetched_before)
+            .with_for_update(skip_locked=True)
+            .cte("claimed")
+        )
+        query = (
+            update(Movie)
+            .where(Movie.id.in_(select(claimed.c.id)))
+            .values(fetched_at=claimed_until)
+            .returning(Movie.id)
+        )
+        return list((await db_session.scalars(query)).all())
+
+    @classmethod
+    async def refresh_many(cls: type[Movie], db_session: AsyncSession, movies_data: dict[int, bytes | None]) -> None:
+        """Save fresh movies data keyed by movie id, movies without data are only marked as fetched."""
+        query = (
+            update(Movie)
+            .where(Movie.id == bindparam("movie_id"))
+            .values(
+                data=func.coalesce(bindparam("data", type_=Text).cast(JSONB), Movie.data),
+                fetched_at=func.now(),
+            )
+        )
+        params = [
+            {"movie_id": movie_id, "data": data.decode() if data is not None else None}
+            for movie_id, data in movies_data.items()
+        ]
+        # executed as core statement, so it is a single executemany and not an orm bulk update
+        await (await db_session.connection()).execute(query, params)
+
+    @classmethod
+    async def get_existing_ids(cls: type[Movie], db_session: AsyncSession, movie_ids: list[int]) -> set[int]:
+        query = select(Movie.id).where(Movie.id == any_(bindparam("movie_ids", movie_ids, type_=ARRAY(Integer))))
+        return set((await db_session.scalars(query)).all())
 
 
 class Favorite(Base):
@@ -47,55 +244,183 @@ class Favorite(Base):
 
     __table_args__ = (
         UniqueConstraint("profile_id", "movie_id", name="unique_favorite"),
+        # supports keyset pagination of profile's favorites
+        Index("ix_favorite_profile_id_id", "profile_id", "id"),
     )
 
-    async def remove(self: Self, db_session: AsyncSession, movie_id: int, profile_id: int) -> None:
+    @classmethod
+    async def remove(cls: type[Favorite], db_session: AsyncSession, movie_id: int, profile_id: int) -> None:
+        if not await cls.remove_many(db_session, [movie_id], profile_id):
+            raise FavoriteNotFoundException
+
+    @classmethod
+    async def add(
+        cls: type[Favorite],
+        db_session: AsyncSession,
+        movie_id: int,
+        movie_data: bytes | None,
+        profile_id: int,
+    ) -> int:
+        """Add movie to profile's favorites saving provided movie data as well if it is not saved yet.
+
+        Both inserts are done in a single statement, duplicates are detected without relying on integrity errors.
+        Data should be provided only if the movie may be missing in `movie` table, e.g. it is fetched from the upstream.
+        """
+        query = (
+            insert(Favorite)
+            .values(profile_id=profile_id, movie_id=movie_id)
+            .on_conflict_do_nothing(constraint="unique_favorite")
+            .returning(Favorite.id)
+        )
+        if movie_data is not None:
+            movie_insert = (
+                insert(Movie)
+                .values(id=movie_id, data=_jsonb(movie_data))
+                .on_conflict_do_nothing(index_elements=[Movie.id])
+                .cte("movie_insert")
+            )
+            query = query.add_cte(movie_insert)
+        favorite_id = (await db_session.execute(query)).scalar_one_or_none()
+        if favorite_id is None:
+            raise FavoriteAlreadyExistsException
+
+        return favorite_id
+
+    @classmethod
+    async def add_many(
+        cls: type[Favorite],
+        db_session: AsyncSession,
+        movie_ids: list[int],
+        profile_id: int,
+        movies_data: dict[int, bytes],
+    ) -> set[int]:
+        """Add movies to profile's favorites saving provided movies data keyed by movie id in the same statement.
+
+        Return ids of movies which were actually added, i.e. ones which were not in favorites yet.
+        """
+        query = (
+            insert(Favorite)
+            .values([{"profile_id": profile_id, "movie_id": movie_id} for movie_id in movie_ids])
+            .on_conflict_do_nothing(constraint="unique_favorite")
+            .returning(Favorite.movie_id)
+        )
+        if movies_data:
+            movie_insert = (
+                insert(Movie)
+                .values([{"id": movie_id, "data": _jsonb(data)} for movie_id, data in movies_data.items()])
+                .on_conflict_do_nothing(index_elements=[Movie.id])
+                .cte("movie_insert")
+            )
+            query = query.add_cte(movie_insert)
+
+        return set((await db_session.scalars(query)).all())
+
+    @classmethod
+    async def remove_many(
+        cls: type[Favorite],
+        db_session: AsyncSession,
+        movie_ids: list[int],
+        profile_id: int,
+    ) -> set[int]:
+        """Remove movies from profile's favorites and return ids of movies which were actually removed.
+
+        Removal is done by a single statement, so there is no race between checking favorite and deleting it.
+        """
         query = (
             delete(Favorite)
             .where(
                 Favorite.profile_id == profile_id,
-                Favorite.movie_id == movie_id,
+                Favorite.movie_id == any_(bindparam("movie_ids", movie_ids, type_=ARRAY(Integer))),
             )
+            .returning(Favorite.movie_id)
         )
-        await db_session.execute(query)
+        return set((await db_session.scalars(query)).all())
+
+    @classmethod
+    async def get_all(
+        cls: type[Favorite],
+        db_session: AsyncSession,
+        profile_id: int,
+        limit: int,
+        cursor: int | None = None,
+    ) -> tuple[list[bytes], int | None]:
+        """Get a page of profile's favorite movies data ordered by favorite id and a cursor of the next page.
+
+        Movies data is encoded as JSON by the DB.
+        """
+        columns = [Movie.data.cast(Text).label("data")]
+        rows, next_cursor = await cls._get_page(db_session, columns, profile_id, limit, cursor)
+
+        return [row.data.encode() for row in rows], next_cursor
 
     @classmethod
-    async def add(cls: type[Favorite], db_session: AsyncSession, movie_id: int, profile_id: int) -> Favorite:
-        new_favorite = Favorite(profile_id=profile_id, movie_id=movie_id)
-        db_session.add(new_favorite)
-        try:
-            await db_session.flush()
-        except IntegrityError:
-            raise FavoriteAlreadyExistsException from None
+    async def get_all_summaries(
+        cls: type[Favorite],
+        db_session: AsyncSession,
+        profile_id: int,
+        limit: int,
+        cursor: int | None = None,
+    ) -> tuple[list[MovieSummary], int | None]:
+        """Get a page of profile's favorite movies summaries, only summary fields are extracted from movie data."""
+        columns = [
+            Favorite.movie_id.label("id"),
+            Movie.data["nameRu"].astext.label("name_ru"),
+            Movie.data["nameEn"].astext.label("name_en"),
+            Movie.data["nameOriginal"].astext.label("name_original"),
+            Movie.data["year"].as_integer().label("year"),
+            Movie.data["posterUrlPreview"].astext.label("poster_url_preview"),
+        ]
+        rows, next_cursor = await cls._get_page(db_session, columns, profile_id, limit, cursor)
 
-        return new_favorite
+        return [MovieSummary.model_validate(row, from_attributes=True) for row in rows], next_cursor
 
     @classmethod
-    async def get(cls: type[Favorite], db_session: AsyncSession, movie_id: int, profile_id: int) -> Favorite | None:
+    async def _get_page(
+        cls: type[Favorite],
+        db_session: AsyncSession,
+        columns: list[ColumnElement[Any]],
+        profile_id: int,
+        limit: int,
+        cursor: int | None,
+    ) -> tuple[Sequence[Row[Any]], int | None]:
         query = (
-            select(Favorite)
+            select(Favorite.id.label("favorite_id"), *columns)
+            .join_from(
+                Favorite, Movie, Favorite.movie_id == Movie.id,
+            )
             .where(
                 Favorite.profile_id == profile_id,
-                Favorite.movie_id == movie_id,
             )
+            .order_by(Favorite.id)
+            # one extra row tells whether there is a next page
+            .limit(limit + 1)
         )
-        row = (await db_session.execute(query)).one_or_none()
-        if not row:
-            return None
+        if cursor is not None:
+            query = query.where(Favorite.id > cursor)
+        rows = (await db_session.execute(query)).all()
 
-        return cast(Favorite, row.Favorite)
+        next_cursor = rows[limit - 1].favorite_id if len(rows) > limit else None
+        return rows[:limit], next_cursor
 
     @classmethod
-    async def get_all(cls: type[Favorite], db_session: AsyncSession, profile_id: int) -> list[MovieData]:
+    async def stream_all(
+        cls: type[Favorite],
+        db_session: AsyncSession,
+        profile_id: int,
+        batch_size: int,
+    ) -> AsyncIterator[bytes]:
+        """Yield encoded data of all profile's favorite movies fetching them from server-side cursor in batches."""
         query = (
-            select(Movie)
+            select(Movie.data.cast(Text))
             .join_from(
                 Favorite, Movie, Favorite.movie_id == Movie.id,
             )
             .where(
                 Favorite.profile_id == profile_id,
             )
+            .order_by(Favorite.id)
+            .execution_options(yield_per=batch_size)
         )
-        rows = (await db_session.execute(query)).all()
-
-        return [MovieData.model_validate(row.Movie, from_attributes=True) for row in rows]
+        result = await db_session.stream_scalars(query)
+        async for data in result:
+            yield data.encode()
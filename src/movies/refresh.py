@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+from dataclasses import asdict, dataclass
+from datetime import timedelta
+from typing import TYPE_CHECKING
+
+import orjson
+
+from src.config import CONFIG
+from src.movies.cache import movie_cache
+from src.movies.exceptions import KinopoiskThrottledException
+from src.movies.kinopoisk import kinopoisk_client
+from src.movies.models import Movie
+from src.shared.database import async_session_factory
+from src.shared.datetime import utcnow
+from src.shared.exceptions import BadGatewayException, HTTPException
+from src.shared.metrics import metrics
+from src.shared.ratelimit import RequestPriority
+
+
+if TYPE_CHECKING:
+    from typing import Self
+
+
+@dataclass(slots=True)
+class MovieRefresherStats:
+    """Counters of background movie data refresh."""
+
+    rounds: int = 0
+    refreshed: int = 0
+    failed: int = 0
+    errors: int = 0
+
+
+class MovieRefresher:
+    """Background worker which keeps saved movie data fresh.
+
+    Each round takes a batch of movies fetched longer than `max_age` seconds ago, most favorited ones first,
+    requests their data from the upstream with background priority and saves it. Round is cut short
+    when the upstream is unavailable or throttled, so user requests aren't starved of upstream capacity.
+
+    Several app instances may run workers, each batch is claimed in `movie` table for `claim_timeout` seconds,
+    so concurrent workers take different movies. Movies left unrefreshed are taken again once their claim expires.
+    """
+
+    def __init__(
+        self: Self,
+        interval: float,
+        max_age: float,
+        batch_size: int,
+        concurrency: int,
+        claim_timeout: float,
+    ) -> None:
+        """Create worker, it is started by `start`."""
+        self.interval = interval
+        self.max_age = max_age
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.claim_timeout = claim_timeout
+        self.stats = MovieRefresherStats()
+        self._task: asyncio.Task[None] | None = None
+
+    def start(self: Self) -> None:
+        """Start refreshing in background. Called on app startup."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(), name="movie-refresher")
+
+    async def stop(self: Self) -> None:
+        """Stop refreshing waiting for the current round to be cancelled. Called on app shutdown."""
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+
+    async def refresh(self: Self) -> int:
+        """Refresh a batch of stale movies and return number of processed ones."""
+        fetched_before = utcnow() - timedelta(seconds=self.max_age)
+        # claimed movies look fetched `claim_timeout` seconds before they get stale
+        claimed_until = fetched_before + timedelta(seconds=self.claim_timeout)
+        async with async_session_factory.begin() as db_session:
+            movie_ids = await Movie.claim_stale_ids(db_session, fetched_before, claimed_until, self.batch_size)
+        if not movie_ids:
+            return 0
+
+        # connection isn't held while waiting for the upstream, data is saved by a separate transaction
+        movies_data = await self._fetch(movie_ids)
+        if movies_data:
+            async with async_session_factory.begin() as db_session:
+                await Movie.refresh_many(db_session, movies_data)
+        return len(movies_data)
+
+    def collect_metrics(self: Self) -> dict[str, float]:
+        return {**asdict(self.stats), "running": self._task is not None and not self._task.done()}
+
+    async def _run(self: Self) -> None:
+        while True:
+            self.stats.rounds += 1
+            try:
+                processed = await self.refresh()
+            except Exception:  # noqa: BLE001
+                # worker keeps running, e.g. when DB is temporarily unavailable
+                self.stats.errors += 1
+                processed = 0
+
+            # next batch is taken at once while there are stale movies
+            if processed < self.batch_size:
+                await asyncio.sleep(self.interval)
+
+    async def _fetch(self: Self, movie_ids: list[int]) -> dict[int, bytes | None]:
+        semaphore = asyncio.Semaphore(self.concurrency)
+        stopped = asyncio.Event()
+
+        async def fetch_one(movie_id: int) -> tuple[int, bytes | None] | None:
+            async with semaphore:
+                if stopped.is_set():
+                    return None
+                try:
+                    data = await kinopoisk_client.get(f"/v2.2/films/{movie_id}", priority=RequestPriority.BACKGROUND)
+                except (BadGatewayException, KinopoiskThrottledException):
+                    # upstream is not healthy, rejects API keys or has no capacity to spare,
+                    # movies are left not fetched and are refreshed once their claim expires
+                    stopped.set()
+                    self.stats.failed += 1
+                    return None
+                except HTTPException:
+                    # upstream can't return this movie now, it is marked as fetched to not block other movies
+                    self.stats.failed += 1
+                    return movie_id, None
+
+            encoded = orjson.dumps(data)
+            movie_cache.set(movie_id, encoded)
+            self.stats.refreshed += 1
+            return movie_id, encoded
+
+        results = await asyncio.gather(*(fetch_one(movie_id) for movie_id in movie_ids))
+        return dict(result for result in results if result is not None)
+
+
+movie_refresher = MovieRefresher(
+    interval=CONFIG.MOVIE_REFRESH_INTERVAL,
+    max_age=CONFIG.MOVIE_REFRESH_MAX_AGE,
+    batch_size=CONFIG.MOVIE_REFRESH_BATCH_SIZE,
+    concurrency=CONFIG.MOVIE_REFRESH_CONCURRENCY,
+    claim_timeout=CONFIG.MOVIE_REFRESH_CLAIM_TIMEOUT,
+)
+
+metrics.register("movie_refresher", movie_refresher.collect_metrics)
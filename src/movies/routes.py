@@ -3,14 +3,18 @@ from __future__ import annotations
 from typing import Annotated
 
 from fastapi import APIRouter, Body, Depends, Path, Query, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.auth.dependencies import get_token
 from src.auth.schemas import TokenPayload
+from src.config import CONFIG
 from src.movies import controllers
-from src.movies.schemas import Movie, MovieData, Movies
-from src.shared.database import get_session
+from src.movies.enums import FavoritesView
+from src.movies.schemas import BatchResults, Movie, MovieData, MovieIds, Movies, MovieSummaries
+from src.shared.database import get_read_session, get_session
 from src.shared.exc_responses import responses
+from src.shared.responses import RawJSONResponse
 
 
 router = APIRouter(tags=["movies"])
@@ -18,20 +22,49 @@ router = APIRouter(tags=["movies"])
 
 @router.get(
     "/movies/favorites",
-    description="Get favorites - get a list of current user's favorite movies data.",
+    description="Get favorites - get a page of current user's favorite movies data in order they were added.",
     responses={
         status.HTTP_200_OK: {"description": "List of current user's favorite movies data is returned."},
         status.HTTP_401_UNAUTHORIZED: responses[status.HTTP_401_UNAUTHORIZED],
         status.HTTP_404_NOT_FOUND: responses[status.HTTP_404_NOT_FOUND],
     },
-    response_model=Movies,
+    response_model=Movies | MovieSummaries,
     status_code=status.HTTP_200_OK,
 )
 async def get_favorites(
-    db_session: AsyncSession = Depends(get_session),
+    limit: Annotated[int, Query(ge=1, le=CONFIG.FAVORITES_MAX_PAGE_SIZE)] = CONFIG.FAVORITES_PAGE_SIZE,
+    cursor: Annotated[int | None, Query(description="`next_cursor` value from the previous page.")] = None,
+    view: Annotated[
+        FavoritesView,
+        Query(description="`full` returns whole movies data, `summary` returns only ids, titles, years and posters."),
+    ] = FavoritesView.FULL,
+    db_session: AsyncSession = Depends(get_read_session),
+    token: TokenPayload = Depends(get_token),
+) -> RawJSONResponse | MovieSummaries:
+    return await controllers.get_favorites(db_session, token, limit, cursor, view)
+
+
+@router.get(
+    "/movies/favorites/export",
+    description=(
+        "Export favorites - stream all of current user's favorite movies data as NDJSON, "
+        "one movie data object per line."
+    ),
+    responses={
+        status.HTTP_200_OK: {
+            "description": "Current user's favorite movies data is streamed.",
+            "content": {"application/x-ndjson": {}},
+        },
+        status.HTTP_401_UNAUTHORIZED: responses[status.HTTP_401_UNAUTHORIZED],
+        status.HTTP_404_NOT_FOUND: responses[status.HTTP_404_NOT_FOUND],
+    },
+    response_class=StreamingResponse,
+    status_code=status.HTTP_200_OK,
+)
+async def export_favorites(
     token: TokenPayload = Depends(get_token),
-) -> Movies:
-    return await controllers.get_favorites(db_session, token)
+) -> StreamingResponse:
+    return StreamingResponse(controllers.export_favorites(token), media_type="application/x-ndjson")
 
 
 @router.post(
@@ -53,13 +86,62 @@ async def add_favourite(
     movie: Annotated[Movie, Body()],
     db_session: AsyncSession = Depends(get_session),
     token: TokenPayload = Depends(get_token),
-) -> MovieData:
+) -> RawJSONResponse:
     return await controllers.add_favourite(movie, db_session, token)
 
 
+@router.post(
+    "/movies/favorites/batch",
+    description=(
+        "Add favorites in batch - request missing movies data, save it to DB and add movies "
+        "to current user's favorites list. Result is reported for each movie id."
+    ),
+    responses={
+        status.HTTP_200_OK: {"description": "Movies are processed, result of each one is returned."},
+        status.HTTP_401_UNAUTHORIZED: responses[status.HTTP_401_UNAUTHORIZED],
+        status.HTTP_403_FORBIDDEN: responses[status.HTTP_403_FORBIDDEN],
+        status.HTTP_404_NOT_FOUND: responses[status.HTTP_404_NOT_FOUND],
+    },
+    response_model=BatchResults,
+    status_code=status.HTTP_200_OK,
+)
+async def add_favorites(
+    movies: Annotated[MovieIds, Body()],
+    db_session: AsyncSession = Depends(get_session),
+    token: TokenPayload = Depends(get_token),
+) -> BatchResults:
+    return await controllers.add_favorites(movies, db_session, token)
+
+
+@router.delete(
+    "/movies/favorites/batch",
+    description=(
+        "Remove favorites in batch - remove movies from current user's favorites list. "
+        "Result is reported for each movie id."
+    ),
+    responses={
+        status.HTTP_200_OK: {"description": "Movies are processed, result of each one is returned."},
+        status.HTTP_401_UNAUTHORIZED: responses[status.HTTP_401_UNAUTHORIZED],
+        status.HTTP_403_FORBIDDEN: responses[status.HTTP_403_FORBIDDEN],
+        status.HTTP_404_NOT_FOUND: responses[status.HTTP_404_NOT_FOUND],
+    },
+    response_model=BatchResults,
+    status_code=status.HTTP_200_OK,
+)
+async def remove_favorites(
+    movies: Annotated[MovieIds, Body()],
+    db_session: AsyncSession = Depends(get_session),
+    token: TokenPayload = Depends(get_token),
+) -> BatchResults:
+    return await controllers.remove_favorites(movies, db_session, token)
+
+
 @router.get(
     "/movies/search",
-    description="Search movie by keyword.",
+    description=(
+        "Search movie by keyword - saved movies are searched first, "
+        "Unofficial Kinopoisk API is only requested if they don't match keyword well enough."
+    ),
     responses={
         status.HTTP_200_OK: {"description": "List of movies' data is returned."},
         status.HTTP_401_UNAUTHORIZED: responses[status.HTTP_401_UNAUTHORIZED],
@@ -73,9 +155,10 @@ async def add_favourite(
 )
 async def movie_search_by_keyword(
     keyword: Annotated[str, Query(example="мстители")],
+    db_session: AsyncSession = Depends(get_read_session),
     token: TokenPayload = Depends(get_token),  # noqa: ARG001
-) -> MovieData:
-    return await controllers.movie_search_by_keyword(keyword)
+) -> RawJSONResponse:
+    return await controllers.movie_search_by_keyword(keyword, db_session)
 
 
 @router.get(
@@ -94,9 +177,10 @@ async def movie_search_by_keyword(
 )
 async def movie_search_by_id(
     kinopoisk_id: Annotated[int, Path(example=301)],
+    db_session: AsyncSession = Depends(get_read_session),
     token: TokenPayload = Depends(get_token),  # noqa: ARG001
-) -> MovieData:
-    return await controllers.movie_search_by_id(kinopoisk_id=kinopoisk_id)
+) -> RawJSONResponse:
+    return await controllers.movie_search_by_id(kinopoisk_id=kinopoisk_id, db_session=db_session)
 
 
 @router.delete(
@@ -4,8 +4,11 @@ from typing import Any
 
 from pydantic import BaseModel, Field
 
+from src.config import CONFIG
+from src.movies.enums import BatchItemStatus
 
-# we choose not to parse kinopoisk data and simply hamfist all of it into db as string
+
+# we choose not to parse kinopoisk data and simply store all of it in db as jsonb document
 # such a solution only came about because there is a pretty tight time constraint for that app's development
 class MovieData(BaseModel):
     data: Any
@@ -15,5 +18,38 @@ class Movie(BaseModel):
     id: int = Field(examples=[301])
 
 
+class MovieIds(BaseModel):
+    ids: list[int] = Field(min_length=1, max_length=CONFIG.FAVORITES_BATCH_MAX_SIZE, examples=[[301, 326]])
+
+
+class MovieSummary(BaseModel):
+    """Short movie data for list views."""
+
+    id: int = Field(examples=[301])
+
+    name_ru: str | None = Field(examples=["Матрица"])
+    name_en: str | None = Field(examples=[None])
+    name_original: str | None = Field(examples=["The Matrix"])
+    year: int | None = Field(examples=[1999])
+    poster_url_preview: str | None = Field(
+        examples=["https://kinopoiskapiunofficial.tech/images/posters/kp_small/301.jpg"],
+    )
+
+
 class Movies(BaseModel):
     movies: list[MovieData]
+    next_cursor: int | None = Field(default=None, description="Cursor of the next page, null on the last page.")
+
+
+class MovieSummaries(BaseModel):
+    movies: list[MovieSummary]
+    next_cursor: int | None = Field(default=None, description="Cursor of the next page, null on the last page.")
+
+
+class BatchItemResult(BaseModel):
+    id: int = Field(examples=[301])
+    status: BatchItemStatus
+
+
+class BatchResults(BaseModel):
+    results: list[BatchItemResult]
@@ -1,11 +1,22 @@
 from __future__ import annotations
 
+import unicodedata
+
 from src.config import CONFIG
 
 
 kinopoisk_unoff_base_url = "https://kinopoiskapiunofficial.tech/api"
 
+# api key header is set per request since requests may be spread between several keys
+api_key_header = "x-api-key"
+
 headers = {
-    "x-api-key": CONFIG.X_API_KEY,
     "Content-Type": "application/json",
 }
+
+api_keys = [CONFIG.X_API_KEY, *CONFIG.X_API_EXTRA_KEYS]
+
+
+def normalize_keyword(keyword: str) -> str:
+    """Normalize search keyword: apply NFKC normalization, fold case and collapse whitespaces."""
+    return " ".join(unicodedata.normalize("NFKC", keyword).casefold().split())
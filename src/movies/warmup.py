@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import time
+from dataclasses import asdict, dataclass
+from typing import TYPE_CHECKING
+
+from src.config import CONFIG
+from src.movies.cache import movie_cache
+from src.movies.controllers import fetch_search_results
+from src.movies.models import Movie
+from src.movies.utlis import normalize_keyword
+from src.shared.database import async_session_factory
+from src.shared.exceptions import HTTPException
+from src.shared.health import readiness
+from src.shared.metrics import metrics
+from src.shared.ratelimit import RequestPriority
+
+
+if TYPE_CHECKING:
+    from typing import Self
+
+
+@dataclass(slots=True)
+class CacheWarmerStats:
+    """Counters of the last cache warm-up."""
+
+    movies: int = 0
+    keywords: int = 0
+    failed_keywords: int = 0
+    errors: int = 0
+    duration: float = 0
+
+
+class CacheWarmer:
+    """Pre-populate in-process caches, so the first requests after a deploy don't stampede the upstream.
+
+    Data of `movies_limit` most favorited movies is loaded from `movie` table into movie cache,
+    results of search by each of `keywords` are requested from the upstream with background priority
+    and at most `concurrency` requests at a time. App worker is reported as not ready until warm-up is over.
+    """
+
+    readiness_name = "cache_warmup"
+
+    def __init__(self: Self, movies_limit: int, keywords: list[str], concurrency: int) -> None:
+        """Create warmer, it is started by `start`."""
+        self.movies_limit = movies_limit
+        self.keywords = keywords
+        self.concurrency = concurrency
+        self.stats = CacheWarmerStats()
+        self._task: asyncio.Task[None] | None = None
+
+    def start(self: Self) -> None:
+        """Start warm-up in background. Called on app startup."""
+        if self._task is None or self._task.done():
+            readiness.wait_for(self.readiness_name)
+            self._task = asyncio.create_task(self._run(), name="cache-warmer")
+
+    async def stop(self: Self) -> None:
+        """Cancel warm-up if it is still running. Called on app shutdown."""
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+
+    async def warm_up(self: Self) -> CacheWarmerStats:
+        started_at = time.monotonic()
+        self.stats = CacheWarmerStats()
+        if self.movies_limit:
+            async with async_session_factory() as db_session:
+                movies_data = await Movie.get_most_favorited_data(db_session, self.movies_limit)
+            for movie_id, data in movies_data.items():
+                movie_cache.set(movie_id, data)
+            self.stats.movies = len(movies_data)
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def fetch_one(keyword: str) -> None:
+            async with semaphore:
+                try:
+                    await fetch_search_results(keyword, RequestPriority.BACKGROUND)
+                except HTTPException:
+                    self.stats.failed_keywords += 1
+                else:
+                    self.stats.keywords += 1
+
+        keywords = dict.fromkeys(normalize_keyword(keyword) for keyword in self.keywords)
+        await asyncio.gather(*(fetch_one(keyword) for keyword in keywords))
+
+        self.stats.duration = time.monotonic() - started_at
+        return self.stats
+
+    def collect_metrics(self: Self) -> dict[str, float]:
+        return {**asdict(self.stats), "ready": readiness.ready}
+
+    async def _run(self: Self) -> None:
+        try:
+            await self.warm_up()
+        except Exception:  # noqa: BLE001
+            # caches are only an optimization, so failed warm-up doesn't keep worker unready
+            self.stats.errors += 1
+        finally:
+            readiness.set_ready(self.readiness_name)
+
+
+cache_warmer = CacheWarmer(
+    movies_limit=CONFIG.WARMUP_MOVIES,
+    keywords=CONFIG.WARMUP_KEYWORDS,
+    concurrency=CONFIG.WARMUP_CONCURRENCY,
+)
+
+metrics.register("cache_warmer", cache_warmer.collect_metrics)
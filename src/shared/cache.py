@@ -0,0 +1,152 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from typing import Generic, TYPE_CHECKING, TypeVar
+
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Hashable
+    from typing import Self
+
+
+K = TypeVar("K", bound="Hashable")
+V = TypeVar("V")
+
+
+@dataclass(slots=True)
+class CacheEntry(Generic[V]):
+    """Cached value with its expiration timestamps."""
+
+    value: V
+    expires_at: float
+    stale_until: float
+    size: int = 0
+
+    def is_fresh(self: Self, now: float) -> bool:
+        return now < self.expires_at
+
+
+@dataclass(slots=True)
+class CacheStats:
+    """Counters of cache usage."""
+
+    hits: int = 0
+    stale_hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+
+
+class TTLCache(Generic[K, V]):
+    """Bounded in-process LRU cache with per-entry TTL.
+
+    Cache is bounded by number of entries and optionally by total size of entries in bytes,
+    entry size is provided by caller on `set`.
+
+    Expired entries are kept for `stale_ttl` more seconds, so callers may fall back to them
+    with `get_stale` when the source of truth is unavailable.
+    """
+
+    def __init__(
+        self: Self,
+        max_items: int,
+        ttl: float,
+        stale_ttl: float = 0,
+        max_bytes: int | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """Create an empty cache."""
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.stats = CacheStats()
+
+        self._clock = clock
+        self._entries: OrderedDict[K, CacheEntry[V]] = OrderedDict()
+        self._bytes = 0
+        # cache may be touched from threadpool workers as well as from the event loop
+        self._lock = threading.Lock()
+
+    def get(self: Self, key: K) -> V | None:
+        """Get fresh value by key."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or not entry.is_fresh(self._clock()):
+                self.stats.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.stats.hits += 1
+            return entry.value
+
+    def get_stale(self: Self, key: K) -> V | None:
+        """Get value by key even if it is expired but still within stale period."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            if entry.stale_until <= self._clock():
+                self._remove(key)
+                return None
+
+            self.stats.stale_hits += 1
+            return entry.value
+
+    @property
+    def size(self: Self) -> int:
+        """Total size of entries in bytes."""
+        return self._bytes
+
+    def __len__(self: Self) -> int:
+        """Get number of entries."""
+        return len(self._entries)
+
+    def set(
+        self: Self,
+        key: K,
+        value: V,
+        ttl: float | None = None,
+        size: int = 0,
+        expires_at: float | None = None,
+    ) -> None:
+        """Put value into the cache evicting the least recently used entries if needed.
+
+        Entry expires in `ttl` seconds or exactly at `expires_at` moment of cache's clock if it is provided.
+        """
+        if expires_at is None:
+            expires_at = self._clock() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._remove(key)
+            if self.max_bytes is not None and size > self.max_bytes:
+                return
+
+            self._entries[key] = CacheEntry(value, expires_at, expires_at + self.stale_ttl, size)
+            self._bytes += size
+            while len(self._entries) > self.max_items or (self.max_bytes is not None and self._bytes > self.max_bytes):
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted.size
+                self.stats.evictions += 1
+
+    def invalidate(self: Self, key: K) -> None:
+        """Remove entry by key if present."""
+        with self._lock:
+            self._remove(key)
+
+    def clear(self: Self) -> None:
+        """Remove all entries."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def collect_metrics(self: Self) -> dict[str, float]:
+        """Get usage counters together with current number and size of entries."""
+        return {**asdict(self.stats), "entries": len(self._entries), "bytes": self._bytes}
+
+    def _remove(self: Self, key: K) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry.size
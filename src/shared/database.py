@@ -1,19 +1,26 @@
 from __future__ import annotations
 
 import asyncio
-from typing import TYPE_CHECKING
+from typing import cast, TYPE_CHECKING
 
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import async_scoped_session, async_sessionmaker, create_async_engine
-from sqlalchemy.orm import DeclarativeBase
+from sqlalchemy.orm import DeclarativeBase, Session
 
 from src.config import CONFIG
+from src.shared.cache import TTLCache
+from src.shared.metrics import metrics
+from src.shared.pool import InstrumentedPool
+from src.shared.replicas import ReplicaSet
 
 
 if TYPE_CHECKING:
-    from collections.abc import AsyncIterator
-    from typing import Final
+    from collections.abc import AsyncIterator, Callable
+    from typing import Any, Final
 
-    from sqlalchemy.ext.asyncio import AsyncSession
+    from sqlalchemy import ClauseElement, Engine, Result
+    from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+    from sqlalchemy.orm import ORMExecuteState, UOWTransaction
 
 
 # constants below are defined only for shortening long names from config
@@ -28,11 +35,93 @@ _USER: Final = CONFIG.POSTGRES_USER
 
 POSTGRES_CONNECTION_URL: Final = f"postgresql+asyncpg://{_USER}:{_PASSWORD}@{_HOST}:{_PORT}/{_DB}"
 
+
+def _create_engine(url: str) -> AsyncEngine:
+    return create_async_engine(
+        url,
+        poolclass=InstrumentedPool,
+        pool_size=CONFIG.POSTGRES_POOL_SIZE,
+        max_overflow=CONFIG.POSTGRES_MAX_OVERFLOW,
+        pool_timeout=CONFIG.POSTGRES_POOL_TIMEOUT,
+        pool_recycle=CONFIG.POSTGRES_POOL_RECYCLE,
+        pool_pre_ping=CONFIG.POSTGRES_POOL_PRE_PING,
+        connect_args={
+            # first one is asyncpg's cache, second one is sqlalchemy's asyncpg adapter cache
+            "statement_cache_size": CONFIG.POSTGRES_STATEMENT_CACHE_SIZE,
+            "prepared_statement_cache_size": CONFIG.POSTGRES_STATEMENT_CACHE_SIZE,
+            "server_settings": CONFIG.POSTGRES_SERVER_SETTINGS,
+        },
+    )
+
+
 # will allow us to connect to the database
-async_engine = create_async_engine(POSTGRES_CONNECTION_URL)
+async_engine = _create_engine(POSTGRES_CONNECTION_URL)
+
+# read-only work doesn't need transactions, autocommit saves BEGIN and COMMIT round-trips
+_read_engine = async_engine.execution_options(isolation_level="AUTOCOMMIT")
+
+# will allow us to spread read-only work between replicas, if there are any
+replicas = ReplicaSet(
+    [_create_engine(url).execution_options(isolation_level="AUTOCOMMIT") for url in CONFIG.POSTGRES_REPLICA_URLS],
+    retry_interval=CONFIG.POSTGRES_REPLICA_RETRY_INTERVAL,
+)
+
+# keys of session's info
+# tells whether session has written anything in its current transaction
+_HAS_WRITES: Final = "has_writes"
+# tells that session must not use replicas
+_USE_PRIMARY: Final = "use_primary"
+# engine chosen for session's reads
+_READ_BIND: Final = "read_bind"
+# callbacks to be called once session's transaction is committed
+_ON_COMMIT: Final = "on_commit"
+
+
+class ReadSession(Session):
+    """Session which sends read queries to a healthy replica and everything else to the primary."""
+
+    def get_bind(
+        self: ReadSession,
+        mapper: Any = None,  # noqa: ANN401, ARG002
+        *,
+        clause: ClauseElement | None = None,
+        **kw: Any,  # noqa: ARG002
+    ) -> Engine:
+        if clause is not None and clause.is_dml:
+            # following reads must see the written changes, and replicas may lag behind
+            self.info[_USE_PRIMARY] = True
+        if self.info.get(_USE_PRIMARY):
+            return _read_engine.sync_engine
+
+        # replica is chosen once per session, so that its queries don't spread connections over replicas
+        if _READ_BIND not in self.info:
+            replica = replicas.choose()
+            self.info[_READ_BIND] = (replica or _read_engine).sync_engine
+        return cast("Engine", self.info[_READ_BIND])
+
+
+# will allow us to open sessions which are not bound to a request's task, e.g. for streaming responses
+async_session_factory = async_sessionmaker(bind=async_engine)
 
 # will allow us to send SQL queries to database associated with engine
-async_session = async_scoped_session(async_sessionmaker(bind=async_engine), scopefunc=asyncio.current_task)
+async_session = async_scoped_session(async_session_factory, scopefunc=asyncio.current_task)
+
+# will allow us to send read-only SQL queries to replicas without BEGIN and COMMIT round-trips
+async_read_session = async_scoped_session(
+    async_sessionmaker(sync_session_class=ReadSession),
+    scopefunc=asyncio.current_task,
+)
+
+# ids of profiles which have written something recently, their reads are served by the primary
+# until replicas catch up with the changes
+# the cache is per process, so a read handled by another worker than the write may still be served by a replica
+_recent_writers: TTLCache[int, bool] = TTLCache(
+    max_items=100_000,
+    ttl=CONFIG.POSTGRES_READ_YOUR_WRITES_WINDOW,
+)
+
+metrics.register("db_pool", lambda: cast(InstrumentedPool, async_engine.sync_engine.pool).collect_metrics())
+metrics.register("db_replicas", replicas.collect_metrics)
 
 
 # will allow us to map relation tables from PostgreSQL to python classes
@@ -41,14 +130,122 @@ class Base(DeclarativeBase):  # pylint: disable=too-few-public-methods
     """Base class for models."""
 
 
-async def get_session() -> AsyncIterator[AsyncSession]:  # pragma: no cover
-    """Get database session. FastAPI dependency for database session."""
-    async with async_session() as session:
-        try:
-            yield session
-        except Exception:
-            await session.rollback()
+@event.listens_for(Session, "do_orm_execute")
+def _track_executed_writes(orm_execute_state: ORMExecuteState) -> None:
+    if not orm_execute_state.is_select:
+        orm_execute_state.session.info[_HAS_WRITES] = True
+
+
+@event.listens_for(Session, "after_flush")
+def _track_flushed_writes(session: Session, _: UOWTransaction) -> None:
+    session.info[_HAS_WRITES] = True
+
+
+@event.listens_for(ReadSession, "before_flush")
+def _use_primary_for_flush(session: Session, *_: Any) -> None:
+    # flushed changes are written to the primary, following reads must see them
+    session.info[_USE_PRIMARY] = True
+
+
+@event.listens_for(ReadSession, "do_orm_execute")
+def _fall_back_to_primary(orm_execute_state: ORMExecuteState) -> Result[Any] | None:
+    # replica is taken out of rotation once its connection fails, the failed read is repeated on the primary
+    # so that the request doesn't fail because of the replica
+    try:
+        return orm_execute_state.invoke_statement()
+    except Exception:
+        session = orm_execute_state.session
+        replica = session.info.get(_READ_BIND)
+        if (
+            not orm_execute_state.is_select
+            or session.info.get(_USE_PRIMARY)
+            or replica is None
+            or replicas.is_healthy(replica)
+        ):
             raise
-        finally:
+
+        session.info[_READ_BIND] = _read_engine.sync_engine
+        return orm_execute_state.invoke_statement()
+
+
+@event.listens_for(Session, "after_commit")
+@event.listens_for(Session, "after_rollback")
+def _reset_writes(session: Session) -> None:
+    session.info.pop(_HAS_WRITES, None)
+
+
+@event.listens_for(Session, "after_commit")
+def _call_on_commit(session: Session) -> None:
+    for callback in session.info.pop(_ON_COMMIT, []):
+        callback()
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_on_commit(session: Session) -> None:
+    session.info.pop(_ON_COMMIT, None)
+
+
+async def get_session() -> AsyncIterator[AsyncSession]:  # pragma: no cover
+    """Get database session. FastAPI dependency for database session.
+
+    Connection is acquired only when session is used for the first time,
+    and transaction is committed only if something was written.
+    """
+    session = async_session()
+    try:
+        yield session
+    except Exception:
+        await session.rollback()
+        raise
+    else:
+        if session.info.get(_HAS_WRITES):
             await session.commit()
-            await session.close()
+    finally:
+        await async_session.remove()
+
+
+async def get_read_session() -> AsyncIterator[AsyncSession]:  # pragma: no cover
+    """Get database session for read-only work. FastAPI dependency for database session.
+
+    Session works in autocommit mode, so there are neither BEGIN nor COMMIT round-trips.
+    It also suits single-statement writes which don't need a transaction, they are committed immediately.
+    """
+    try:
+        yield async_read_session()
+    finally:
+        await async_read_session.remove()
+
+
+def mark_written(profile_id: int) -> None:
+    """Remember that profile has written something, so its next reads should be served by the primary."""
+    if replicas.engines:
+        _recent_writers.set(profile_id, True)  # noqa: FBT003
+
+
+def on_commit(session: AsyncSession, callback: Callable[[], object]) -> None:
+    """Call `callback` once changes written by session are committed, it is dropped if they are rolled back.
+
+    Should be used for side effects which must not outlive the changes, e.g. caching of written data.
+    """
+    if isinstance(session.sync_session, ReadSession):
+        # read session works in autocommit mode, its changes are already committed
+        callback()
+        return
+
+    session.info.setdefault(_ON_COMMIT, []).append(callback)
+
+
+def read_your_writes(session: AsyncSession, profile_id: int) -> None:
+    """Pin read session to the primary if profile has recently written something."""
+    if replicas.engines and _recent_writers.get(profile_id):
+        session.info[_USE_PRIMARY] = True
+
+
+async def release_connection(session: AsyncSession) -> None:
+    """Return session's connection to the pool if session hasn't written anything yet.
+
+    Should be called before awaiting something slow, e.g. an upstream response,
+    session stays usable and acquires a connection again on the next query.
+    """
+    if session.in_transaction() and not session.info.get(_HAS_WRITES):
+        await session.rollback()
@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+import json
+from typing import TYPE_CHECKING
+
+from fastapi.responses import Response
+
+from src.shared.exceptions import HTTPException
+
+
+if TYPE_CHECKING:
+    from typing import Final, Self
+
+
+# optional fields of exceptions, rendered before description and details
+_CONTEXT_FIELDS: Final = ("action", "resource")
+
+
+def _render(exception: HTTPException | type[HTTPException]) -> bytes:
+    content = {field: getattr(exception, field) for field in _CONTEXT_FIELDS if hasattr(exception, field)}
+    content["description"] = exception.description
+    content["details"] = exception.details
+    # same serialization as in `JSONResponse.render`
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+
+
+class ErrorResponses:
+    """Registry of pre-rendered response bodies of app exceptions.
+
+    Exceptions carry only class-level constants, so each class is serialized once
+    and error responses are built from ready bytes.
+    """
+
+    def __init__(self: Self) -> None:
+        """Create empty registry, bodies are rendered by `prerender` or on first use."""
+        self._bodies: dict[type[HTTPException], bytes] = {}
+
+    def prerender(self: Self) -> None:
+        """Render bodies of all currently defined exception classes. Called on app startup."""
+        pending = [HTTPException]
+        while pending:
+            exception_class = pending.pop()
+            self._bodies[exception_class] = _render(exception_class)
+            pending.extend(exception_class.__subclasses__())
+
+    def response(self: Self, exception: HTTPException) -> Response:
+        return Response(content=self._body(exception), status_code=exception.status_code, media_type="application/json")
+
+    def _body(self: Self, exception: HTTPException) -> bytes:
+        if vars(exception):
+            # fields are overridden on the instance, body can't be shared
+            return _render(exception)
+
+        exception_class = type(exception)
+        body = self._bodies.get(exception_class)
+        if body is None:
+            body = self._bodies[exception_class] = _render(exception_class)
+        return body
+
+
+error_responses = ErrorResponses()
@@ -44,6 +44,18 @@ responses = {
             },
         },
     },
+    status.HTTP_429_TOO_MANY_REQUESTS: {
+        "description": "Request rate limit is exceeded.",
+        "model": schemas.TooManyRequestsResponse,
+        "content": {
+            "application/json": {
+                "example": {
+                    "description": exceptions.TooManyRequestsException.description,
+                    "details": exceptions.TooManyRequestsException.details,
+                },
+            },
+        },
+    },
     status.HTTP_502_BAD_GATEWAY: {
         "description": "Failed to connect to a remote server.",
         "model": schemas.BadGatewayResponse,
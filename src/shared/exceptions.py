@@ -49,6 +49,14 @@ class BadRequestException(HTTPException):
     status_code = status.HTTP_400_BAD_REQUEST
 
 
+class TooManyRequestsException(HTTPException):
+    """Exception for 429 TOO MANY REQUESTS error."""
+
+    description = "Too many requests."
+    details = "Request rate limit is exceeded, please try again later."
+    status_code = status.HTTP_429_TOO_MANY_REQUESTS
+
+
 class BadGatewayException(HTTPException):
     """Exception for 502 BAD GATEWAY error."""
 
@@ -0,0 +1,36 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+
+if TYPE_CHECKING:
+    from typing import Self
+
+
+class Readiness:
+    """Registry of components app worker waits for before it is ready to serve requests.
+
+    Worker is ready when none of the registered components is pending,
+    e.g. it is ready at once if nothing has been registered.
+    """
+
+    def __init__(self: Self) -> None:
+        """Create registry without pending components."""
+        self._pending: set[str] = set()
+
+    @property
+    def ready(self: Self) -> bool:
+        return not self._pending
+
+    @property
+    def pending(self: Self) -> list[str]:
+        return sorted(self._pending)
+
+    def wait_for(self: Self, name: str) -> None:
+        self._pending.add(name)
+
+    def set_ready(self: Self, name: str) -> None:
+        self._pending.discard(name)
+
+
+readiness = Readiness()
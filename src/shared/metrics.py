@@ -0,0 +1,32 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+    from typing import Self
+
+    MetricsCollector = Callable[[], dict[str, float]]
+
+
+class MetricsRegistry:
+    """Registry of in-process metrics collectors.
+
+    Each component registers a callable returning its current counters and gauges,
+    they are only evaluated when metrics are requested.
+    """
+
+    def __init__(self: Self) -> None:
+        """Create empty registry."""
+        self._collectors: dict[str, MetricsCollector] = {}
+
+    def register(self: Self, name: str, collector: MetricsCollector) -> None:
+        assert name not in self._collectors, f"Metrics collector {name!r} is already registered."
+        self._collectors[name] = collector
+
+    def collect(self: Self) -> dict[str, dict[str, float]]:
+        return {name: collector() for name, collector in self._collectors.items()}
+
+
+metrics = MetricsRegistry()
@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+
+if TYPE_CHECKING:
+    from typing import Any, Self
+
+    from sqlalchemy.pool import PoolProxiedConnection
+
+
+@dataclass(slots=True)
+class PoolStats:
+    """Counters of connections checkouts."""
+
+    checkouts: int = 0
+    checkout_timeouts: int = 0
+    checkout_wait_seconds_total: float = 0
+    checkout_wait_seconds_max: float = 0
+
+
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    """Async queue pool which measures how long it takes to check out a connection."""
+
+    stats: PoolStats
+
+    def __init__(self: Self, *args: Any, **kwargs: Any) -> None:
+        """Create pool with empty stats."""
+        super().__init__(*args, **kwargs)
+        self.stats = PoolStats()
+
+    def connect(self: Self) -> PoolProxiedConnection:
+        started = time.perf_counter()
+        try:
+            return super().connect()
+        except PoolTimeoutError:
+            self.stats.checkout_timeouts += 1
+            raise
+        finally:
+            waited = time.perf_counter() - started
+            self.stats.checkouts += 1
+            self.stats.checkout_wait_seconds_total += waited
+            self.stats.checkout_wait_seconds_max = max(self.stats.checkout_wait_seconds_max, waited)
+
+    def recreate(self: Self) -> InstrumentedPool:
+        # pool is recreated on engine disposal, stats are carried over to keep counters monotonic
+        pool = super().recreate()
+        assert isinstance(pool, InstrumentedPool)
+        pool.stats = self.stats
+        return pool
+
+    def collect_metrics(self: Self) -> dict[str, float]:
+        """Get checkout counters together with current pool usage."""
+        return {
+            "checkouts": self.stats.checkouts,
+            "checkout_timeouts": self.stats.checkout_timeouts,
+            "checkout_wait_seconds_total": self.stats.checkout_wait_seconds_total,
+            "checkout_wait_seconds_max": self.stats.checkout_wait_seconds_max,
+            "size": self.size(),
+            "checked_in": self.checkedin(),
+            "checked_out": self.checkedout(),
+            "overflow": self.overflow(),
+        }
@@ -0,0 +1,265 @@
+from __future__ import annotations
+
+import abc
+import asyncio
+import enum
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from typing import TYPE_CHECKING
+
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+    from typing import Self
+
+
+# quotas of upstream APIs are usually reset daily
+_DAY_SECONDS = 86_400
+
+
+class RequestPriority(enum.IntEnum):
+    USER = 0
+    BACKGROUND = 1
+
+
+class RateLimitedError(Exception):
+    """Request is shed since it could not be sent within rate limit in time."""
+
+
+class QuotaExceededError(Exception):
+    """Request is shed since there is no quota left for it."""
+
+
+@dataclass(slots=True)
+class RateLimiterStats:
+    """Counters of rate limiter decisions."""
+
+    allowed: int = 0
+    rejected: int = 0
+    evictions: int = 0
+
+
+class RateLimiterBackend(abc.ABC):
+    """Interface of rate limiter storages, e.g. in-process memory or a shared one."""
+
+    @abc.abstractmethod
+    async def hit(self: Self, key: str, limit: int, window: float) -> bool:
+        """Register a hit for the key and check whether there were no more than `limit` hits within `window` seconds.
+
+        Rejected hits are not registered.
+        """
+
+    @abc.abstractmethod
+    def collect_metrics(self: Self) -> dict[str, float]:
+        """Get backend's counters."""
+
+
+@dataclass(slots=True)
+class _Window:
+    started_at: float
+    current: int = 0
+    previous: int = 0
+
+
+class InMemoryRateLimiterBackend(RateLimiterBackend):
+    """In-process sliding window rate limiter.
+
+    Sliding window is approximated by the current and the previous fixed windows, the previous one is weighted
+    by its part overlapping with the sliding window, so only two counters are kept per key.
+    Memory is bounded by the number of keys, least recently hit keys are evicted first.
+    """
+
+    def __init__(self: Self, max_keys: int, clock: Callable[[], float] = time.monotonic) -> None:
+        """Create backend without any hits."""
+        self.max_keys = max_keys
+        self.stats = RateLimiterStats()
+
+        self._clock = clock
+        self._windows: OrderedDict[str, _Window] = OrderedDict()
+        self._lock = threading.Lock()
+
+    async def hit(self: Self, key: str, limit: int, window: float) -> bool:
+        now = self._clock()
+        with self._lock:
+            state = self._windows.get(key)
+            if state is None:
+                state = self._windows[key] = _Window(started_at=now - now % window)
+                while len(self._windows) > self.max_keys:
+                    self._windows.popitem(last=False)
+                    self.stats.evictions += 1
+            self._windows.move_to_end(key)
+
+            elapsed = now - state.started_at
+            if elapsed >= window:
+                # previous window is the last one only if no whole window has passed since it ended
+                state.previous = state.current if elapsed < 2 * window else 0
+                state.current = 0
+                state.started_at = now - now % window
+                elapsed = now - state.started_at
+
+            estimated = state.previous * (1 - elapsed / window) + state.current
+            if estimated >= limit:
+                self.stats.rejected += 1
+                return False
+
+            state.current += 1
+            self.stats.allowed += 1
+            return True
+
+    def collect_metrics(self: Self) -> dict[str, float]:
+        return {**asdict(self.stats), "keys": len(self._windows)}
+
+
+@dataclass(slots=True)
+class UpstreamLimiterStats:
+    """Counters of upstream limiter decisions."""
+
+    acquired: int = 0
+    delayed: int = 0
+    rate_limited: int = 0
+    quota_exceeded: int = 0
+
+
+@dataclass(slots=True)
+class _ApiKey:
+    key: str
+    tokens: float
+    updated_at: float
+    day: int = 0
+    used: int = 0
+    exhausted: bool = False
+
+
+class UpstreamLimiter:
+    """Client-side rate limiter and daily quota accountant of upstream API keys.
+
+    Each key has a token bucket refilled with `rate` tokens per second up to `burst` ones, a request takes
+    a token of the key which has the most of them, so requests are spread between keys.
+    User requests wait for a token for at most `max_wait` seconds and background requests wait as long
+    as it takes, but they only take a token when no user request is waiting for it.
+
+    A request reserves a unit of daily quota of its key along with the token, so concurrent requests can't
+    overshoot the quota, and the unit is given back with `release` if the request hasn't been sent.
+    Background requests are shed when only `background_reserve` part of quota is left, user ones when nothing is left.
+    Quota usage is tracked per process, so each of N workers may use the whole quota.
+    """
+
+    def __init__(  # noqa: PLR0913
+        self: Self,
+        keys: list[str],
+        rate: float,
+        burst: int,
+        daily_quota: int | None,
+        background_reserve: float,
+        max_wait: float,
+        clock: Callable[[], float] = time.monotonic,
+        wall_clock: Callable[[], float] = time.time,
+    ) -> None:
+        """Create limiter with full buckets of all keys."""
+        self.rate = rate
+        self.burst = burst
+        self.daily_quota = daily_quota
+        self.background_reserve = background_reserve
+        self.max_wait = max_wait
+        self.stats = UpstreamLimiterStats()
+
+        self._clock = clock
+        self._wall_clock = wall_clock
+        self._keys = [_ApiKey(key=key, tokens=burst, updated_at=clock()) for key in keys]
+        self._user_waiters = 0
+
+    async def acquire(self: Self, priority: RequestPriority) -> str:
+        """Wait for a turn to send a request and return the key to send it with.
+
+        Raise `RateLimitedError` or `QuotaExceededError` if request is shed.
+        """
+        is_user = priority == RequestPriority.USER
+        deadline = self._clock() + self.max_wait
+        if is_user:
+            self._user_waiters += 1
+        try:
+            while True:
+                now = self._clock()
+                keys = [key for key in self._keys if self._has_quota(key, priority)]
+                if not keys:
+                    self.stats.quota_exceeded += 1
+                    raise QuotaExceededError
+
+                for key in keys:
+                    self._refill(key, now)
+                key = max(keys, key=lambda key: key.tokens)
+                # waiting user requests go first, so background ones are delayed even if there is a token
+                if key.tokens >= 1 and (is_user or self._user_waiters == 0):
+                    key.tokens -= 1
+                    key.used += 1
+                    self.stats.acquired += 1
+                    return key.key
+
+                wait = (1 - key.tokens) / self.rate if key.tokens < 1 else 1 / self.rate
+                if is_user and now + wait > deadline:
+                    self.stats.rate_limited += 1
+                    raise RateLimitedError
+
+                self.stats.delayed += 1
+                await asyncio.sleep(wait)
+        finally:
+            if is_user:
+                self._user_waiters -= 1
+
+    def release(self: Self, key: str) -> None:
+        """Give back quota unit reserved with the key by `acquire` when request hasn't been sent."""
+        api_key = self._get(key)
+        self._roll_day(api_key)
+        # unit reserved before the day has changed is already given back with the whole quota
+        api_key.used = max(0, api_key.used - 1)
+
+    def exhaust(self: Self, key: str) -> None:
+        """Stop using the key till the end of the day, e.g. when upstream reports that its quota is exceeded."""
+        api_key = self._get(key)
+        self._roll_day(api_key)
+        api_key.exhausted = True
+
+    def drain(self: Self, key: str) -> None:
+        """Take all tokens of the key, e.g. when upstream reports that its rate limit is exceeded."""
+        api_key = self._get(key)
+        api_key.tokens = 0
+        api_key.updated_at = self._clock()
+
+    def collect_metrics(self: Self) -> dict[str, float]:
+        # keys are secrets, so they are reported by their indexes
+        now = self._clock()
+        key_metrics = {}
+        for index, key in enumerate(self._keys):
+            self._roll_day(key)
+            self._refill(key, now)
+            key_metrics[f"key_{index}_tokens"] = key.tokens
+            key_metrics[f"key_{index}_used"] = key.used
+            if self.daily_quota is not None:
+                key_metrics[f"key_{index}_remaining"] = 0 if key.exhausted else max(0, self.daily_quota - key.used)
+        return {**asdict(self.stats), "user_waiters": self._user_waiters, **key_metrics}
+
+    def _get(self: Self, key: str) -> _ApiKey:
+        return next(api_key for api_key in self._keys if api_key.key == key)
+
+    def _has_quota(self: Self, key: _ApiKey, priority: RequestPriority) -> bool:
+        self._roll_day(key)
+        if key.exhausted:
+            return False
+        if self.daily_quota is None:
+            return True
+
+        reserve = self.daily_quota * self.background_reserve if priority == RequestPriority.BACKGROUND else 0
+        return self.daily_quota - key.used > reserve
+
+    def _refill(self: Self, key: _ApiKey, now: float) -> None:
+        key.tokens = min(self.burst, key.tokens + (now - key.updated_at) * self.rate)
+        key.updated_at = now
+
+    def _roll_day(self: Self, key: _ApiKey) -> None:
+        day = int(self._wall_clock() // _DAY_SECONDS)
+        if key.day != day:
+            key.day = day
+            key.used = 0
+            key.exhausted = False
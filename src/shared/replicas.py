@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import time
+from dataclasses import asdict, dataclass
+from typing import TYPE_CHECKING
+
+from sqlalchemy import event
+
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+    from typing import Any, Self
+
+    from sqlalchemy.engine import Dialect, Engine, ExceptionContext
+    from sqlalchemy.engine.interfaces import DBAPIConnection
+    from sqlalchemy.ext.asyncio import AsyncEngine
+    from sqlalchemy.pool import ConnectionPoolEntry
+
+
+@dataclass(slots=True)
+class ReplicaSetStats:
+    """Counters of read queries routing."""
+
+    replica_reads: int = 0
+    primary_fallbacks: int = 0
+    failures: int = 0
+
+
+class ReplicaSet:
+    """Round-robin balancer over read replicas which skips unhealthy ones.
+
+    Replica is considered unhealthy for `retry_interval` seconds after
+    connection to it has failed or has been lost.
+    """
+
+    def __init__(
+        self: Self,
+        engines: list[AsyncEngine],
+        retry_interval: float,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """Create balancer and subscribe to errors of each replica engine."""
+        self.engines = engines
+        self.retry_interval = retry_interval
+        self.stats = ReplicaSetStats()
+
+        self._clock = clock
+        self._next = 0
+        self._unhealthy_until = [0.0] * len(engines)
+        for index, engine in enumerate(engines):
+            event.listen(engine.sync_engine, "do_connect", self._connect_handler(index))
+            event.listen(engine.sync_engine, "handle_error", self._error_handler(index))
+
+    def choose(self: Self) -> AsyncEngine | None:
+        """Get next healthy replica engine or None if there is no one."""
+        if not self.engines:
+            return None
+
+        now = self._clock()
+        for _ in range(len(self.engines)):
+            index = self._next % len(self.engines)
+            self._next += 1
+            if self._unhealthy_until[index] <= now:
+                self.stats.replica_reads += 1
+                return self.engines[index]
+
+        self.stats.primary_fallbacks += 1
+        return None
+
+    def is_healthy(self: Self, engine: Engine) -> bool:
+        """Tell whether replica with given sync engine is used now, engines of other databases are always healthy."""
+        now = self._clock()
+        return all(
+            until <= now
+            for replica, until in zip(self.engines, self._unhealthy_until, strict=True)
+            if replica.sync_engine is engine
+        )
+
+    def collect_metrics(self: Self) -> dict[str, float]:
+        now = self._clock()
+        healthy = sum(1 for until in self._unhealthy_until if until <= now)
+        return {**asdict(self.stats), "replicas": len(self.engines), "healthy": healthy}
+
+    def _mark_unhealthy(self: Self, index: int) -> None:
+        self._unhealthy_until[index] = self._clock() + self.retry_interval
+        self.stats.failures += 1
+
+    def _connect_handler(self: Self, index: int) -> Callable[..., DBAPIConnection]:
+        # errors of establishing a connection (e.g. refused one) are not always passed to `handle_error`
+        def do_connect(
+            dialect: Dialect,
+            _: ConnectionPoolEntry,
+            cargs: tuple[Any, ...],
+            cparams: dict[str, Any],
+        ) -> DBAPIConnection:
+            try:
+                return dialect.connect(*cargs, **cparams)
+            except Exception:
+                self._mark_unhealthy(index)
+                raise
+
+        return do_connect
+
+    def _error_handler(self: Self, index: int) -> Callable[[ExceptionContext], None]:
+        def handle_error(context: ExceptionContext) -> None:
+            if context.is_disconnect:
+                self._mark_unhealthy(index)
+
+        return handle_error
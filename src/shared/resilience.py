@@ -0,0 +1,277 @@
+from __future__ import annotations
+
+import asyncio
+import enum
+import random
+import time
+from dataclasses import asdict, dataclass
+from typing import Generic, TYPE_CHECKING, TypeVar
+
+
+if TYPE_CHECKING:
+    from collections.abc import Awaitable, Callable
+    from typing import Self
+
+
+V = TypeVar("V")
+
+
+class CircuitState(enum.Enum):
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Call is rejected without being made since the circuit is open."""
+
+
+class RetryBudget:
+    """Token bucket which limits retries to a fraction of calls.
+
+    Each call deposits `ratio` tokens and each retry withdraws a whole one, additionally
+    `min_per_second` tokens are refilled over time, so rare calls can still be retried.
+    Bucket is capped, so retries can't turn an upstream outage into a retry storm.
+    """
+
+    def __init__(
+        self: Self,
+        ratio: float,
+        min_per_second: float,
+        capacity: float,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """Create a full budget."""
+        self.ratio = ratio
+        self.min_per_second = min_per_second
+        self.capacity = capacity
+
+        self._clock = clock
+        self._tokens = capacity
+        self._updated_at = clock()
+
+    @property
+    def tokens(self: Self) -> float:
+        self._refill()
+        return self._tokens
+
+    def deposit(self: Self) -> None:
+        self._refill()
+        self._tokens = min(self.capacity, self._tokens + self.ratio)
+
+    def withdraw(self: Self) -> bool:
+        """Take a token for a retry, return False if the budget is exhausted."""
+        self._refill()
+        if self._tokens < 1:
+            return False
+
+        self._tokens -= 1
+        return True
+
+    def _refill(self: Self) -> None:
+        now = self._clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.min_per_second)
+        self._updated_at = now
+
+
+class CircuitBreaker:
+    """Circuit breaker counting consecutive failures.
+
+    Circuit opens after `failure_threshold` consecutive failures and rejects calls for `recovery_timeout`
+    seconds, then a single probe call is let through: its success closes the circuit and its failure opens it again.
+    """
+
+    def __init__(
+        self: Self,
+        failure_threshold: int,
+        recovery_timeout: float,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """Create a closed circuit."""
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+
+        self._clock = clock
+        self._state = CircuitState.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._probe_started_at = 0.0
+
+    @property
+    def state(self: Self) -> CircuitState:
+        if self._state == CircuitState.OPEN and self._clock() - self._opened_at >= self.recovery_timeout:
+            self._state = CircuitState.HALF_OPEN
+            self._probing = False
+        return self._state
+
+    def allow(self: Self) -> bool:
+        """Check whether a call may be made now."""
+        state = self.state
+        if state == CircuitState.CLOSED:
+            return True
+        # probe which hasn't completed in time (e.g. it was cancelled) doesn't hold the circuit forever
+        now = self._clock()
+        probe_expired = now - self._probe_started_at >= self.recovery_timeout
+        if state == CircuitState.HALF_OPEN and (not self._probing or probe_expired):
+            self._probing = True
+            self._probe_started_at = now
+            return True
+        return False
+
+    def record_success(self: Self) -> None:
+        self._state = CircuitState.CLOSED
+        self._failures = 0
+        self._probing = False
+
+    def record_failure(self: Self) -> None:
+        self._failures += 1
+        if self._state == CircuitState.HALF_OPEN or self._failures >= self.failure_threshold:
+            self._state = CircuitState.OPEN
+            self._opened_at = self._clock()
+            self._probing = False
+
+
+@dataclass(slots=True)
+class ResilienceStats:
+    """Counters of upstream calls made through resilience policy."""
+
+    calls: int = 0
+    failures: int = 0
+    timeouts: int = 0
+    deadlines_exceeded: int = 0
+    retries: int = 0
+    budget_exhausted: int = 0
+    hedges: int = 0
+    hedge_wins: int = 0
+    rejected: int = 0
+
+
+class ResiliencePolicy(Generic[V]):
+    """Policy of calling an unreliable upstream.
+
+    - each attempt is limited by `attempt_timeout` and the whole call including retries by `deadline`;
+    - transient failures are retried with exponential backoff and full jitter while retry budget allows it;
+    - calls fail fast with `CircuitOpenError` while circuit breaker is open;
+    - if `hedge_delay` is set and an attempt doesn't complete in time, a second one is sent concurrently
+      and the first successful result wins.
+
+    Timeouts are always considered transient, other errors only if `is_transient` says so.
+    Non-transient errors mean that the upstream has responded, so they are not counted as failures.
+    """
+
+    def __init__(  # noqa: PLR0913
+        self: Self,
+        attempt_timeout: float,
+        deadline: float,
+        max_attempts: int,
+        backoff_base: float,
+        backoff_max: float,
+        budget: RetryBudget,
+        breaker: CircuitBreaker,
+        is_transient: Callable[[Exception], bool],
+        hedge_delay: float | None = None,
+    ) -> None:
+        """Create policy, budget and breaker may be shared between several policies of the same upstream."""
+        self.attempt_timeout = attempt_timeout
+        self.deadline = deadline
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.budget = budget
+        self.breaker = breaker
+        self.is_transient = is_transient
+        self.hedge_delay = hedge_delay
+        self.stats = ResilienceStats()
+
+    async def call(self: Self, func: Callable[[], Awaitable[V]]) -> V:
+        """Call `func` applying the policy, the last error is raised if all attempts have failed."""
+        self.stats.calls += 1
+        if not self.breaker.allow():
+            self.stats.rejected += 1
+            raise CircuitOpenError
+
+        self.budget.deposit()
+        deadline = asyncio.timeout(self.deadline)
+        try:
+            async with deadline:
+                return await self._call(func)
+        except TimeoutError:
+            # timeout of the last attempt is reraised as is, it doesn't mean that the deadline is exceeded
+            if deadline.expired():
+                self.stats.deadlines_exceeded += 1
+            raise
+
+    def collect_metrics(self: Self) -> dict[str, float]:
+        return {
+            **asdict(self.stats),
+            "retry_budget": self.budget.tokens,
+            "circuit_open": self.breaker.state != CircuitState.CLOSED,
+        }
+
+    async def _call(self: Self, func: Callable[[], Awaitable[V]]) -> V:
+        attempt = 0
+        while True:
+            try:
+                result = await self._attempt(func)
+            except Exception as error:  # noqa: PERF203
+                if isinstance(error, TimeoutError):
+                    self.stats.timeouts += 1
+                elif not self.is_transient(error):
+                    self.breaker.record_success()
+                    raise
+
+                self.stats.failures += 1
+                self.breaker.record_failure()
+                attempt += 1
+                if attempt >= self.max_attempts or not self.breaker.allow():
+                    raise
+                if not self.budget.withdraw():
+                    self.stats.budget_exhausted += 1
+                    raise
+
+                self.stats.retries += 1
+                backoff = min(self.backoff_max, self.backoff_base * 2 ** (attempt - 1))
+                # full jitter spreads retries of concurrent callers, it isn't used for anything security related
+                await asyncio.sleep(random.uniform(0, backoff))  # noqa: S311
+            else:
+                self.breaker.record_success()
+                return result
+
+    async def _attempt(self: Self, func: Callable[[], Awaitable[V]]) -> V:
+        async with asyncio.timeout(self.attempt_timeout):
+            if self.hedge_delay is None:
+                return await func()
+            return await self._hedged(func, self.hedge_delay)
+
+    async def _hedged(self: Self, func: Callable[[], Awaitable[V]], hedge_delay: float) -> V:
+        primary = asyncio.ensure_future(func())
+        started = [primary]
+        tasks = {primary}
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=hedge_delay)
+            # hedge is a retry as well, so it is limited by the same budget
+            if not done and self.budget.withdraw():
+                self.stats.hedges += 1
+                started.append(asyncio.ensure_future(func()))
+                tasks.add(started[-1])
+
+            error: BaseException | None = None
+            while tasks:
+                done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is not primary:
+                            self.stats.hedge_wins += 1
+                        return task.result()
+                    error = task.exception()
+
+            assert error is not None
+            raise error
+        finally:
+            for task in started:
+                if not task.done():
+                    task.cancel()
+                elif not task.cancelled():
+                    # error of the losing attempt is retrieved, so it isn't reported as never retrieved
+                    task.exception()
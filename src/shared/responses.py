@@ -0,0 +1,12 @@
+from __future__ import annotations
+
+from fastapi.responses import Response
+
+
+class RawJSONResponse(Response):
+    """Response with already encoded JSON content.
+
+    Content is sent as is, it is neither validated against response model nor serialized once again.
+    """
+
+    media_type = "application/json"
@@ -26,6 +26,10 @@ class NotAllowedResponse(HTTPError):
     action: str
 
 
+class TooManyRequestsResponse(HTTPError):
+    """Schema for 429 TOO MANY REQUESTS response."""
+
+
 class BadGatewayResponse(HTTPError):
     """Schema for 502 BAD GATEWAY response."""
 
@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass, field
+from typing import Generic, TYPE_CHECKING, TypeVar
+
+
+if TYPE_CHECKING:
+    from collections.abc import Awaitable, Callable, Hashable
+    from typing import Self
+
+
+K = TypeVar("K", bound="Hashable")
+V = TypeVar("V")
+
+
+@dataclass(slots=True)
+class SingleFlightStats:
+    """Counters of single-flight usage."""
+
+    calls: int = 0
+    coalesced: int = 0
+    cancelled: int = 0
+
+
+@dataclass(slots=True)
+class _Call(Generic[V]):
+    task: asyncio.Task[V]
+    waiters: int = field(default=0)
+
+
+class SingleFlight(Generic[K, V]):
+    """Coalesce concurrent identical calls into a single in-flight one.
+
+    All callers with the same key await the same task and get its result or its exception.
+    A cancelled caller doesn't affect other callers, the shared task is cancelled
+    only when there are no callers left to await it.
+    """
+
+    def __init__(self: Self) -> None:
+        """Create single-flight group without in-flight calls."""
+        self.stats = SingleFlightStats()
+        self._calls: dict[K, _Call[V]] = {}
+
+    @property
+    def in_flight(self: Self) -> int:
+        return len(self._calls)
+
+    async def do(self: Self, key: K, func: Callable[[], Awaitable[V]]) -> V:
+        """Call `func` or join the in-flight call with the same key."""
+        call = self._calls.get(key)
+        if call is None:
+            call = _Call(asyncio.ensure_future(func()))
+            self._calls[key] = call
+            call.task.add_done_callback(lambda _: self._forget(key, call))
+            self.stats.calls += 1
+        else:
+            self.stats.coalesced += 1
+
+        call.waiters += 1
+        try:
+            # shield keeps the shared task running if only this caller is cancelled
+            return await asyncio.shield(call.task)
+        finally:
+            call.waiters -= 1
+            if call.waiters == 0 and not call.task.done():
+                # nobody is interested in result anymore, new callers must start a new call
+                self._forget(key, call)
+                call.task.cancel()
+                self.stats.cancelled += 1
+
+    def _forget(self: Self, key: K, call: _Call[V]) -> None:
+        if self._calls.get(key) is call:
+            del self._calls[key]
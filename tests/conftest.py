@@ -2,12 +2,31 @@ from __future__ import annotations
 
 import asyncio
 
-from httpx import AsyncClient
 import pytest
+from httpx import AsyncClient
 from sqlalchemy.ext.asyncio import async_scoped_session, async_sessionmaker, create_async_engine
 
 from src.app import app
-from src.shared.database import get_session, POSTGRES_CONNECTION_URL
+from src.auth.models import Profile
+from src.shared.database import get_read_session, get_session, POSTGRES_CONNECTION_URL
+
+
+class FakeClock:
+    """Clock which is moved by tests."""
+
+    def __init__(self):
+        """Start at zero."""
+        self.now = 0.0
+
+    def __call__(self):
+        """Get current time."""
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    """Fake clock to be injected instead of `time.monotonic`."""
+    return FakeClock()
 
 
 @pytest.fixture
@@ -19,12 +38,16 @@ def anyio_backend():
 @pytest.fixture
 async def db_empty():
     """Empty database session."""
-    # this solution is from sqlalchemy docs:
-    # https://docs.sqlalchemy.org/en/14/orm/session_transaction.html#joining-a-session-into-an-external-transaction-such-as-for-test-suites
+    # this solution is from sqlalchemy docs, session commits and rollbacks are done within a savepoint,
+    # so e.g. rollback of a read-only session by `release_connection` keeps the outer transaction:
+    # https://docs.sqlalchemy.org/en/20/orm/session_transaction.html#joining-a-session-into-an-external-transaction-such-as-for-test-suites
     async_engine = create_async_engine(POSTGRES_CONNECTION_URL, connect_args={"server_settings": {"jit": "off"}})
     connection = await async_engine.connect()
     transaction = await connection.begin()
-    async_session = async_scoped_session(async_sessionmaker(bind=connection), scopefunc=asyncio.current_task)
+    async_session = async_scoped_session(
+        async_sessionmaker(bind=connection, join_transaction_mode="create_savepoint"),
+        scopefunc=asyncio.current_task,
+    )
 
     yield async_session
 
@@ -33,11 +56,24 @@ async def db_empty():
     await connection.close()
 
 
+@pytest.fixture
+async def profile_id(db_empty):
+    """Id of a new profile without favorites."""
+    profile = Profile(name="example_username")
+    db_empty.add(profile)
+    await db_empty.flush()
+    profile_id = profile.id
+    # only the savepoint is committed, so the profile outlives rollbacks done by tests and is removed after the test
+    await db_empty.commit()
+    return profile_id
+
+
 @pytest.fixture
 async def async_client(db_empty):
     """Async client."""
     def override_get_session():
         yield db_empty
     app.dependency_overrides[get_session] = override_get_session
+    app.dependency_overrides[get_read_session] = override_get_session
     async with AsyncClient(app=app, base_url="http://") as async_client:
         yield async_client
@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+import orjson
+import pytest
+
+from src.auth.schemas import TokenPayload
+from src.movies import controllers
+from src.movies.enums import BatchItemStatus
+from src.movies.exceptions import KinopoiskUnavailableException
+from src.movies.models import Favorite, Movie
+from src.movies.schemas import Movie as MovieSchema
+from src.movies.schemas import MovieIds
+from src.shared.cache import TTLCache
+
+
+class StubKinopoiskClient:
+    """Client returning data of any requested movie except the failing ones."""
+
+    def __init__(self):
+        """Create client without requests."""
+        self.requests = []
+        self.failing_ids = set()
+
+    async def get(self, path, params=None, priority=None):
+        self.requests.append((path, params, priority))
+        movie_id = int(path.rsplit("/", 1)[1])
+        if movie_id in self.failing_ids:
+            raise KinopoiskUnavailableException
+        return {"kinopoiskId": movie_id, "nameRu": "Матрица"}
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    """Stub of the upstream."""
+    client = StubKinopoiskClient()
+    monkeypatch.setattr(controllers, "kinopoisk_client", client)
+    return client
+
+
+@pytest.fixture
+async def db_session(db_empty):
+    """Session of the current task like the one passed to controllers by app's dependency."""
+    return db_empty()
+
+
+@pytest.fixture
+def movie_cache(monkeypatch):
+    """Empty movie data cache."""
+    cache = TTLCache(max_items=10, ttl=60)
+    monkeypatch.setattr(controllers, "movie_cache", cache)
+    return cache
+
+
+@pytest.mark.anyio
+async def test_fetched_movie_is_cached_once_committed(db_session, profile_id, upstream, movie_cache):
+    await controllers.add_favourite(MovieSchema(id=301), db_session, TokenPayload(profile_id=profile_id))
+    assert movie_cache.get(301) is None
+
+    await db_session.commit()
+
+    assert orjson.loads(movie_cache.get(301)) == {"kinopoiskId": 301, "nameRu": "Матрица"}
+    assert len(upstream.requests) == 1
+
+
+@pytest.mark.anyio
+async def test_fetched_movie_is_not_cached_when_rolled_back(db_session, profile_id, upstream, movie_cache):
+    await controllers.add_favourite(MovieSchema(id=301), db_session, TokenPayload(profile_id=profile_id))
+
+    await db_session.rollback()
+
+    assert movie_cache.get(301) is None
+    # movie isn't taken for saved, so it is fetched and saved again
+    await controllers.add_favourite(MovieSchema(id=301), db_session, TokenPayload(profile_id=profile_id))
+    assert await Movie.get_existing_ids(db_session, [301]) == {301}
+    assert len(upstream.requests) == 2
+
+
+@pytest.mark.anyio
+async def test_saved_movie_is_not_fetched(db_session, profile_id, upstream, movie_cache):
+    await Movie.add(db_session, 301, orjson.dumps({"kinopoiskId": 301}))
+
+    response = await controllers.add_favourite(MovieSchema(id=301), db_session, TokenPayload(profile_id=profile_id))
+
+    assert orjson.loads(response.body) == {"data": {"kinopoiskId": 301}}
+    assert upstream.requests == []
+
+
+@pytest.mark.anyio
+async def test_batch_reports_status_of_each_movie(db_session, profile_id, upstream, movie_cache):
+    token = TokenPayload(profile_id=profile_id)
+    await Movie.add(db_session, 302, orjson.dumps({"kinopoiskId": 302}))
+    await Favorite.add(db_session, 303, orjson.dumps({"kinopoiskId": 303}), profile_id)
+    upstream.failing_ids = {304}
+
+    results = await controllers.add_favorites(MovieIds(ids=[301, 302, 303, 304, 301]), db_session, token)
+
+    assert [(result.id, result.status) for result in results.results] == [
+        (301, BatchItemStatus.ADDED),
+        (302, BatchItemStatus.ADDED),
+        (303, BatchItemStatus.ALREADY_EXISTS),
+        (304, BatchItemStatus.FAILED),
+    ]
+    # only movies missing in the table are requested from the upstream
+    assert [path for path, _, _ in upstream.requests] == ["/v2.2/films/301", "/v2.2/films/304"]
+    assert await Movie.get_existing_ids(db_session, [301, 304]) == {301}
+
+
+@pytest.mark.anyio
+async def test_batch_caches_fetched_movies_once_committed(db_session, profile_id, upstream, movie_cache):
+    token = TokenPayload(profile_id=profile_id)
+    await controllers.add_favorites(MovieIds(ids=[301, 302]), db_session, token)
+    assert movie_cache.get(301) is None
+
+    await db_session.rollback()
+    assert movie_cache.get(301) is None
+
+    await controllers.add_favorites(MovieIds(ids=[301, 302]), db_session, token)
+    await db_session.commit()
+    assert orjson.loads(movie_cache.get(302)) == {"kinopoiskId": 302, "nameRu": "Матрица"}
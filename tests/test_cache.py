@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+import orjson
+import pytest
+
+from src.config import CONFIG
+from src.movies import controllers
+from src.movies.utlis import normalize_keyword
+from src.shared.cache import TTLCache
+
+
+class StubKinopoiskClient:
+    """Client returning provided search results."""
+
+    def __init__(self, results):
+        """Create client returning `results` on every request."""
+        self.results = results
+        self.requests = []
+
+    async def get(self, path, params=None, priority=None):
+        self.requests.append((path, params, priority))
+        return self.results
+
+
+@pytest.fixture
+def search_cache(monkeypatch, clock):
+    """Empty search results cache on the fake clock."""
+    cache = TTLCache(max_items=10, ttl=CONFIG.SEARCH_CACHE_TTL, clock=clock)
+    monkeypatch.setattr(controllers, "search_cache", cache)
+    return cache
+
+
+@pytest.mark.parametrize(
+    ("keyword", "normalized"),
+    [
+        ("Матрица", "матрица"),
+        ("  The   Matrix\tReloaded ", "the matrix reloaded"),
+        # fullwidth letters
+        ("\uff2d\uff21\uff34\uff32\uff29\uff38", "matrix"),
+        ("Straße", "strasse"),
+    ],
+)
+def test_normalize_keyword(keyword, normalized):
+    assert normalize_keyword(keyword) == normalized
+
+
+def test_entries_are_evicted_by_total_size(clock):
+    cache = TTLCache(max_items=10, max_bytes=10, ttl=60, clock=clock)
+    cache.set("first", b"1234", size=4)
+    cache.set("second", b"1234", size=4)
+    # first entry becomes the most recently used one
+    assert cache.get("first") == b"1234"
+
+    cache.set("third", b"1234", size=4)
+
+    assert cache.get("second") is None
+    assert cache.get("first") == b"1234"
+    assert cache.get("third") == b"1234"
+    assert cache.size == 8
+    assert cache.stats.evictions == 1
+
+
+def test_entry_larger_than_cache_is_not_stored(clock):
+    cache = TTLCache(max_items=10, max_bytes=10, ttl=60, clock=clock)
+    cache.set("small", b"1234", size=4)
+
+    cache.set("large", b"12345678901", size=11)
+
+    assert cache.get("large") is None
+    assert cache.get("small") == b"1234"
+    assert cache.size == 4
+
+
+def test_replaced_entry_size_is_released(clock):
+    cache = TTLCache(max_items=10, max_bytes=10, ttl=60, clock=clock)
+    cache.set("key", b"12345678", size=8)
+
+    cache.set("key", b"12", size=2)
+
+    assert cache.size == 2
+    assert cache.stats.evictions == 0
+
+
+def test_expired_entry_is_served_as_stale(clock):
+    cache = TTLCache(max_items=10, ttl=60, stale_ttl=30, clock=clock)
+    cache.set("key", b"value")
+
+    clock.now = 60.0
+    assert cache.get("key") is None
+    assert cache.get_stale("key") == b"value"
+
+    clock.now = 90.0
+    assert cache.get_stale("key") is None
+    assert len(cache) == 0
+
+
+@pytest.mark.anyio
+async def test_empty_search_results_are_cached_shortly(monkeypatch, clock, search_cache):
+    monkeypatch.setattr(controllers, "kinopoisk_client", StubKinopoiskClient({"keyword": "nothing", "films": []}))
+
+    data = await controllers.fetch_search_results("nothing")
+
+    assert orjson.loads(data)["films"] == []
+    clock.now = CONFIG.SEARCH_CACHE_NEGATIVE_TTL - 1
+    assert search_cache.get("nothing") == data
+    clock.now = CONFIG.SEARCH_CACHE_NEGATIVE_TTL
+    assert search_cache.get("nothing") is None
+
+
+@pytest.mark.anyio
+async def test_search_results_are_cached(monkeypatch, clock, search_cache):
+    results = {"keyword": "матрица", "films": [{"filmId": 301}]}
+    monkeypatch.setattr(controllers, "kinopoisk_client", StubKinopoiskClient(results))
+
+    data = await controllers.fetch_search_results("матрица")
+
+    clock.now = CONFIG.SEARCH_CACHE_NEGATIVE_TTL
+    assert search_cache.get("матрица") == data
+    clock.now = CONFIG.SEARCH_CACHE_TTL
+    assert search_cache.get("матрица") is None
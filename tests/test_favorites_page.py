@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+import orjson
+import pytest
+
+from src.auth.models import Profile
+from src.movies.models import Favorite, Movie
+
+
+async def add_favorites(db_session, profile_id, count):
+    movie_ids = list(range(301, 301 + count))
+    movies_data = {
+        movie_id: orjson.dumps({"kinopoiskId": movie_id, "nameRu": f"Фильм {movie_id}", "year": 2000})
+        for movie_id in movie_ids
+    }
+    await Favorite.add_many(db_session, movie_ids, profile_id, movies_data)
+    return movie_ids
+
+
+def movie_ids(page):
+    return [orjson.loads(data)["kinopoiskId"] for data in page]
+
+
+@pytest.mark.anyio
+async def test_pages_are_linked_by_cursor(db_empty, profile_id):
+    added_ids = await add_favorites(db_empty, profile_id, 5)
+
+    first_page, cursor = await Favorite.get_all(db_empty, profile_id, limit=2)
+    second_page, cursor = await Favorite.get_all(db_empty, profile_id, limit=2, cursor=cursor)
+    last_page, cursor = await Favorite.get_all(db_empty, profile_id, limit=2, cursor=cursor)
+
+    assert movie_ids(first_page) + movie_ids(second_page) + movie_ids(last_page) == added_ids
+    assert len(last_page) == 1
+    assert cursor is None
+
+
+@pytest.mark.anyio
+async def test_full_last_page_has_no_cursor(db_empty, profile_id):
+    await add_favorites(db_empty, profile_id, 4)
+
+    first_page, cursor = await Favorite.get_all(db_empty, profile_id, limit=2)
+    assert cursor is not None
+
+    # the extra row is absent, so limit rows are the last ones
+    last_page, cursor = await Favorite.get_all(db_empty, profile_id, limit=2, cursor=cursor)
+    assert len(last_page) == 2
+    assert cursor is None
+
+
+@pytest.mark.anyio
+async def test_page_of_limit_plus_one_rows(db_empty, profile_id):
+    await add_favorites(db_empty, profile_id, 3)
+
+    page, cursor = await Favorite.get_all_summaries(db_empty, profile_id, limit=2)
+    assert [summary.id for summary in page] == [301, 302]
+    assert cursor is not None
+
+    page, cursor = await Favorite.get_all_summaries(db_empty, profile_id, limit=2, cursor=cursor)
+    assert [summary.id for summary in page] == [303]
+    assert cursor is None
+
+
+@pytest.mark.anyio
+async def test_other_profiles_favorites_are_not_paged(db_empty, profile_id):
+    other_profile = Profile(name="other_username")
+    db_empty.add(other_profile)
+    await db_empty.flush()
+    await add_favorites(db_empty, other_profile.id, 2)
+
+    page, cursor = await Favorite.get_all(db_empty, profile_id, limit=2)
+
+    assert page == []
+    assert cursor is None
+    assert await Movie.get_existing_ids(db_empty, [301, 302]) == {301, 302}
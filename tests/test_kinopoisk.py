@@ -0,0 +1,160 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from src.movies.exceptions import KinopoiskUnavailableException
+from src.movies.kinopoisk import KinopoiskClient
+from src.movies.utlis import api_key_header
+from src.shared.exceptions import BadGatewayException
+from src.shared.ratelimit import RequestPriority, UpstreamLimiter
+from src.shared.resilience import CircuitBreaker, ResiliencePolicy, RetryBudget
+
+
+class StubKinopoisk:
+    """Stub of the upstream answering with queued statuses, 200 when the queue is empty."""
+
+    def __init__(self):
+        """Create stub without queued responses."""
+        self.statuses = []
+        self.requests = []
+        self.peers = []
+        self.keys = []
+
+    async def handle(self, request):
+        self.requests.append(request.path_qs)
+        self.peers.append(request.transport.get_extra_info("peername"))
+        self.keys.append(request.headers[api_key_header])
+        status = self.statuses.pop(0) if self.statuses else 200
+        if status != 200:
+            return web.Response(status=status)
+        return web.json_response({"filmId": 301, "apiKey": request.headers[api_key_header]})
+
+
+@pytest.fixture
+async def stub():
+    """Running stub of the upstream."""
+    stub = StubKinopoisk()
+    app = web.Application()
+    app.router.add_get("/{path:.*}", stub.handle)
+    server = TestServer(app)
+    await server.start_server()
+    stub.base_url = str(server.make_url("")).rstrip("/")
+
+    yield stub
+
+    await server.close()
+
+
+@pytest.fixture
+async def client(stub):
+    """Client of the stub, failed requests are retried at once."""
+    policy = ResiliencePolicy(
+        attempt_timeout=1,
+        deadline=5,
+        max_attempts=3,
+        backoff_base=0,
+        backoff_max=0,
+        budget=RetryBudget(ratio=1, min_per_second=0, capacity=10),
+        breaker=CircuitBreaker(failure_threshold=10, recovery_timeout=60),
+        is_transient=lambda error: isinstance(error, KinopoiskUnavailableException),
+    )
+    limiter = UpstreamLimiter(
+        keys=["key", "other_key"], rate=1000, burst=100, daily_quota=1000, background_reserve=0, max_wait=1,
+    )
+    client = KinopoiskClient(policy, limiter, base_url=stub.base_url)
+
+    yield client
+
+    await client.close()
+
+
+@pytest.mark.anyio
+async def test_get_returns_decoded_body(stub, client):
+    data = await client.get("/v2.2/films/301", params={"page": "1"})
+
+    assert data == {"filmId": 301, "apiKey": "key"}
+    assert stub.requests == ["/v2.2/films/301?page=1"]
+
+
+@pytest.mark.anyio
+async def test_unauthorized_is_bad_gateway(stub, client):
+    stub.statuses = [401]
+
+    with pytest.raises(BadGatewayException) as error:
+        await client.get("/v2.2/films/301")
+
+    assert error.type is BadGatewayException
+    assert error.value.status_code == 502
+    # upstream has responded, request isn't retried
+    assert len(stub.requests) == 1
+
+
+@pytest.mark.anyio
+async def test_server_error_is_unavailable(stub, client):
+    stub.statuses = [500, 503, 502]
+
+    with pytest.raises(KinopoiskUnavailableException) as error:
+        await client.get("/v2.2/films/301")
+
+    assert error.value.status_code == 502
+    assert len(stub.requests) == 3
+
+
+@pytest.mark.anyio
+async def test_session_is_reused(stub, client):
+    await client.get("/v2.2/films/301")
+    await client.get("/v2.2/films/302")
+
+    # second request is sent over the same keep-alive connection of the pooled session
+    assert stub.peers[0] == stub.peers[1]
+
+
+@pytest.mark.anyio
+async def test_server_error_is_retried(stub, client):
+    stub.statuses = [503, 429]
+
+    data = await client.get("/v2.2/films/301")
+
+    assert data["filmId"] == 301
+    assert len(stub.requests) == 3
+    assert client.policy.stats.retries == 2
+    # each attempt takes its own token
+    assert client.limiter.stats.acquired == 3
+
+
+@pytest.mark.anyio
+async def test_concurrent_requests_are_coalesced_by_priority(stub, client):
+    await asyncio.gather(
+        client.get("/v2.2/films/301"),
+        client.get("/v2.2/films/301"),
+        client.get("/v2.2/films/301", priority=RequestPriority.BACKGROUND),
+    )
+
+    assert len(stub.requests) == 2
+
+
+@pytest.mark.anyio
+async def test_throttled_request_is_retried_with_another_key(stub, client):
+    stub.statuses = [429]
+
+    data = await client.get("/v2.2/films/301")
+
+    assert data["apiKey"] == "other_key"
+    assert stub.keys == ["key", "other_key"]
+
+
+@pytest.mark.anyio
+async def test_unsent_request_does_not_use_quota(client):
+    # nothing listens on this port, so connections to it are refused
+    client.base_url = "http://127.0.0.1:1"
+
+    with pytest.raises(KinopoiskUnavailableException):
+        await client.get("/v2.2/films/301")
+
+    metrics = client.limiter.collect_metrics()
+    assert metrics["acquired"] == 3
+    assert metrics["key_0_used"] + metrics["key_1_used"] == 0
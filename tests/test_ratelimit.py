@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from src.auth import controllers
+from src.auth.exceptions import TooManyLoginAttemptsException
+from src.auth.ratelimit import LoginRateLimiter
+from src.auth.schemas import Credentials
+from src.config import CONFIG
+from src.shared.ratelimit import InMemoryRateLimiterBackend, QuotaExceededError, RequestPriority, UpstreamLimiter
+
+
+class UntouchableSession:
+    """Database session which fails the test on any use."""
+
+    def __getattr__(self, name):
+        message = f"database session is used: {name}"
+        raise AssertionError(message)
+
+
+@pytest.mark.anyio
+async def test_burst_up_to_limit_then_rejected(clock):
+    backend = InMemoryRateLimiterBackend(max_keys=10, clock=clock)
+
+    assert [await backend.hit("key", 3, 10) for _ in range(4)] == [True, True, True, False]
+    # other keys are limited separately
+    assert await backend.hit("other", 3, 10)
+    assert backend.stats.allowed == 4
+    assert backend.stats.rejected == 1
+
+
+@pytest.mark.anyio
+async def test_window_slides(clock):
+    backend = InMemoryRateLimiterBackend(max_keys=10, clock=clock)
+    assert await backend.hit("key", 2, 10)
+    assert await backend.hit("key", 2, 10)
+
+    # previous window fully overlaps the sliding one at the start of the next window
+    clock.now = 10.0
+    assert not await backend.hit("key", 2, 10)
+
+    # half of the previous window has slid out
+    clock.now = 15.0
+    assert await backend.hit("key", 2, 10)
+    assert not await backend.hit("key", 2, 10)
+
+    # no hits within the last whole window
+    clock.now = 30.0
+    assert await backend.hit("key", 2, 10)
+    assert await backend.hit("key", 2, 10)
+
+
+@pytest.mark.anyio
+async def test_least_recently_hit_key_is_evicted(clock):
+    backend = InMemoryRateLimiterBackend(max_keys=2, clock=clock)
+    assert await backend.hit("first", 1, 10)
+    assert await backend.hit("second", 1, 10)
+    # first key becomes the most recently hit one, even though the hit is rejected
+    assert not await backend.hit("first", 1, 10)
+
+    assert await backend.hit("third", 1, 10)
+
+    assert backend.stats.evictions == 1
+    assert backend.collect_metrics()["keys"] == 2
+    # evicted key starts from scratch, kept one is still limited
+    assert await backend.hit("second", 1, 10)
+    assert not await backend.hit("third", 1, 10)
+
+
+@pytest.fixture
+def credentials():
+    """Credentials of a profile which doesn't have to exist."""
+    return Credentials(name="example_username", password="Examplepassword123")  # noqa: S106
+
+
+@pytest.fixture
+def login_rate_limiter(monkeypatch, clock):
+    """Login limiter with a fresh backend."""
+    limiter = LoginRateLimiter(InMemoryRateLimiterBackend(max_keys=10_000, clock=clock))
+    monkeypatch.setattr(controllers, "login_rate_limiter", limiter)
+    return limiter
+
+
+@pytest.mark.anyio
+async def test_login_is_rejected_before_database_access(login_rate_limiter, credentials):
+    for attempt in range(CONFIG.AUTH_LOGIN_RATE_LIMIT_PER_NAME):
+        await login_rate_limiter.check(credentials.name, f"10.0.{attempt // 256}.{attempt % 256}")
+
+    with pytest.raises(TooManyLoginAttemptsException) as error:
+        await controllers.login(credentials, UntouchableSession(), "10.1.0.1")
+    assert error.value.status_code == 429
+
+
+@pytest.mark.anyio
+async def test_login_is_limited_per_host(login_rate_limiter, credentials):
+    for attempt in range(CONFIG.AUTH_LOGIN_RATE_LIMIT_PER_HOST):
+        await login_rate_limiter.check(f"username_{attempt}", "10.0.0.1")
+
+    with pytest.raises(TooManyLoginAttemptsException):
+        await controllers.login(credentials, UntouchableSession(), "10.0.0.1")
+
+
+def upstream_limiter(clock, daily_quota):
+    return UpstreamLimiter(
+        keys=["key"],
+        rate=1000,
+        burst=100,
+        daily_quota=daily_quota,
+        background_reserve=0,
+        max_wait=1,
+        clock=clock,
+        wall_clock=clock,
+    )
+
+
+@pytest.mark.anyio
+async def test_concurrent_requests_do_not_overshoot_quota(clock):
+    limiter = upstream_limiter(clock, daily_quota=2)
+
+    results = await asyncio.gather(
+        *(limiter.acquire(RequestPriority.USER) for _ in range(5)),
+        return_exceptions=True,
+    )
+
+    assert results.count("key") == 2
+    assert sum(isinstance(result, QuotaExceededError) for result in results) == 3
+    assert limiter.collect_metrics()["key_0_remaining"] == 0
+
+
+@pytest.mark.anyio
+async def test_released_quota_is_reused(clock):
+    limiter = upstream_limiter(clock, daily_quota=1)
+    key = await limiter.acquire(RequestPriority.USER)
+
+    limiter.release(key)
+
+    assert await limiter.acquire(RequestPriority.USER) == key
+    with pytest.raises(QuotaExceededError):
+        await limiter.acquire(RequestPriority.USER)
@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+from datetime import timedelta
+
+import orjson
+import pytest
+from sqlalchemy import delete, select, update
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from src.movies import refresh
+from src.movies.models import Favorite, Movie
+from src.movies.refresh import MovieRefresher
+from src.shared.cache import TTLCache
+from src.shared.database import POSTGRES_CONNECTION_URL
+from src.shared.datetime import utcnow
+from src.shared.exceptions import BadGatewayException
+
+
+MAX_AGE = timedelta(hours=1)
+CLAIM_TIMEOUT = timedelta(minutes=10)
+
+
+class StubKinopoiskClient:
+    """Client returning data of any requested movie until its key is rejected."""
+
+    def __init__(self):
+        """Create client without requests."""
+        self.requests = []
+        self.rejected_after = None
+
+    async def get(self, path, params=None, priority=None):
+        self.requests.append((path, params, priority))
+        if self.rejected_after is not None and len(self.requests) > self.rejected_after:
+            raise BadGatewayException
+        movie_id = int(path.rsplit("/", 1)[1])
+        return {"kinopoiskId": movie_id, "nameRu": "Матрица"}
+
+
+async def add_stale_movies(db_session, movie_ids):
+    # earlier ids are fetched earlier, so they are claimed first
+    for age, movie_id in enumerate(reversed(movie_ids), start=1):
+        await Movie.add(db_session, movie_id, orjson.dumps({"kinopoiskId": movie_id}))
+        fetched_at = utcnow() - MAX_AGE - timedelta(minutes=age)
+        await db_session.execute(update(Movie).where(Movie.id == movie_id).values(fetched_at=fetched_at))
+
+
+async def claim(db_session, after=timedelta(0)):
+    # claim as a worker would do `after` given time
+    fetched_before = utcnow() + after - MAX_AGE
+    return set(await Movie.claim_stale_ids(db_session, fetched_before, fetched_before + CLAIM_TIMEOUT, limit=10))
+
+
+@pytest.mark.anyio
+async def test_claimed_movies_are_taken_again_once_claim_expires(db_empty):
+    await add_stale_movies(db_empty, [301, 302])
+
+    assert await claim(db_empty) == {301, 302}
+    assert await claim(db_empty) == set()
+    assert await claim(db_empty, after=CLAIM_TIMEOUT + timedelta(seconds=1)) == {301, 302}
+
+
+@pytest.mark.anyio
+async def test_most_favorited_movies_are_claimed_first(db_empty, profile_id):
+    await add_stale_movies(db_empty, [301, 302, 303])
+    await Favorite.add(db_empty, 303, orjson.dumps({"kinopoiskId": 303}), profile_id)
+
+    fetched_before = utcnow() - MAX_AGE
+    claimed_ids = await Movie.claim_stale_ids(db_empty, fetched_before, fetched_before + CLAIM_TIMEOUT, limit=2)
+
+    # the most favorited one goes first, then the least recently fetched one
+    assert set(claimed_ids) == {303, 301}
+
+
+@pytest.fixture
+async def committed_movies():
+    """Stale movies visible to all connections, they are removed after the test."""
+    engine = create_async_engine(POSTGRES_CONNECTION_URL)
+    session_factory = async_sessionmaker(bind=engine)
+    movie_ids = [301, 302, 303]
+    async with session_factory.begin() as db_session:
+        await add_stale_movies(db_session, movie_ids)
+
+    yield session_factory
+
+    async with session_factory.begin() as db_session:
+        await db_session.execute(delete(Movie).where(Movie.id.in_(movie_ids)))
+    await engine.dispose()
+
+
+@pytest.mark.anyio
+async def test_movies_locked_by_concurrent_claim_are_skipped(committed_movies):
+    async with committed_movies.begin() as locking_session, committed_movies.begin() as db_session:
+        await locking_session.execute(select(Movie.id).where(Movie.id == 301).with_for_update())
+
+        # claim neither waits for the lock nor takes the locked movie
+        assert await claim(db_session) == {302, 303}
+
+        await locking_session.rollback()
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    """Stub of the upstream."""
+    client = StubKinopoiskClient()
+    monkeypatch.setattr(refresh, "kinopoisk_client", client)
+    monkeypatch.setattr(refresh, "movie_cache", TTLCache(max_items=10, ttl=60))
+    return client
+
+
+@pytest.fixture
+async def refresher(monkeypatch, db_empty):
+    """Refresher working within the test's transaction, movies are requested one by one."""
+    session_factory = async_sessionmaker(bind=db_empty.bind, join_transaction_mode="create_savepoint")
+    monkeypatch.setattr(refresh, "async_session_factory", session_factory)
+    return MovieRefresher(
+        interval=60,
+        max_age=MAX_AGE.total_seconds(),
+        batch_size=10,
+        concurrency=1,
+        claim_timeout=CLAIM_TIMEOUT.total_seconds(),
+    )
+
+
+@pytest.mark.anyio
+async def test_round_is_stopped_by_rejected_key(db_empty, upstream, refresher):
+    await add_stale_movies(db_empty, [301, 302, 303])
+    upstream.rejected_after = 1
+
+    assert await refresher.refresh() == 1
+
+    # movies after the rejected one aren't requested
+    assert len(upstream.requests) == 2
+    assert refresher.stats.refreshed == 1
+    assert refresher.stats.failed == 1
+    refreshed_id = int(upstream.requests[0][0].rsplit("/", 1)[1])
+    assert orjson.loads(await Movie.get_data(db_empty, refreshed_id))["nameRu"] == "Матрица"
+    # not refreshed movies aren't marked as fetched, they are taken again once their claim expires
+    assert await claim(db_empty, after=CLAIM_TIMEOUT + timedelta(seconds=1)) == {301, 302, 303} - {refreshed_id}
@@ -0,0 +1,190 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from src.shared.resilience import CircuitBreaker, CircuitOpenError, CircuitState, ResiliencePolicy, RetryBudget
+
+
+class TransientError(Exception):
+    """Failure which is worth retrying."""
+
+
+class FaultyUpstream:
+    """Upstream stub failing or answering according to queued faults, answering when the queue is empty."""
+
+    def __init__(self, *faults):
+        """Queue faults: an exception to raise or a number of seconds to hang for before answering."""
+        self.faults = list(faults)
+        self.calls = 0
+        self.cancelled = 0
+
+    async def __call__(self):
+        self.calls += 1
+        call = self.calls
+        fault = self.faults.pop(0) if self.faults else None
+        if isinstance(fault, Exception):
+            raise fault
+        if fault is not None:
+            try:
+                await asyncio.sleep(fault)
+            except asyncio.CancelledError:
+                self.cancelled += 1
+                raise
+        return call
+
+
+def make_policy(clock, **options):
+    """Create policy retrying at once with a generous budget unless other options are given."""
+    return ResiliencePolicy(
+        **{
+            "attempt_timeout": 1,
+            "deadline": 5,
+            "max_attempts": 3,
+            "backoff_base": 0,
+            "backoff_max": 0,
+            "budget": RetryBudget(ratio=1, min_per_second=0, capacity=10, clock=clock),
+            "breaker": CircuitBreaker(failure_threshold=5, recovery_timeout=10, clock=clock),
+            "is_transient": lambda error: isinstance(error, TransientError),
+            **options,
+        },
+    )
+
+
+def test_breaker_opens_and_half_opens(clock):
+    breaker = CircuitBreaker(failure_threshold=2, recovery_timeout=10, clock=clock)
+
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == CircuitState.OPEN
+    assert not breaker.allow()
+
+    # single probe is let through after recovery timeout, its failure opens circuit again
+    clock.now = 10.0
+    assert breaker.state == CircuitState.HALF_OPEN
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == CircuitState.OPEN
+    assert not breaker.allow()
+
+    # successful probe closes circuit
+    clock.now = 20.0
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CircuitState.CLOSED
+    assert breaker.allow()
+
+
+def test_breaker_probe_expires(clock):
+    breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=10, clock=clock)
+    breaker.record_failure()
+
+    clock.now = 10.0
+    assert breaker.allow()
+    # probe has never completed, e.g. it was cancelled
+    clock.now = 20.0
+    assert breaker.allow()
+
+
+@pytest.mark.anyio
+async def test_open_circuit_rejects_calls(clock):
+    policy = make_policy(clock, breaker=CircuitBreaker(failure_threshold=2, recovery_timeout=10, clock=clock))
+    upstream = FaultyUpstream(TransientError(), TransientError())
+
+    with pytest.raises(TransientError):
+        await policy.call(upstream)
+    with pytest.raises(CircuitOpenError):
+        await policy.call(upstream)
+
+    assert upstream.calls == 2
+    assert policy.stats.rejected == 1
+
+    clock.now = 10.0
+    assert await policy.call(upstream) == 3
+    assert policy.breaker.state == CircuitState.CLOSED
+
+
+@pytest.mark.anyio
+async def test_transient_failure_is_retried(clock):
+    policy = make_policy(clock)
+    upstream = FaultyUpstream(TransientError())
+
+    assert await policy.call(upstream) == 2
+    assert policy.stats.retries == 1
+    assert policy.stats.failures == 1
+
+
+@pytest.mark.anyio
+async def test_non_transient_error_is_not_retried(clock):
+    policy = make_policy(clock, breaker=CircuitBreaker(failure_threshold=1, recovery_timeout=10, clock=clock))
+    upstream = FaultyUpstream(ValueError())
+
+    with pytest.raises(ValueError):  # noqa: PT011
+        await policy.call(upstream)
+
+    assert upstream.calls == 1
+    assert policy.stats.failures == 0
+    assert policy.breaker.state == CircuitState.CLOSED
+
+
+@pytest.mark.anyio
+async def test_retries_stop_when_budget_is_exhausted(clock):
+    budget = RetryBudget(ratio=0, min_per_second=1, capacity=1, clock=clock)
+    policy = make_policy(clock, max_attempts=5, budget=budget)
+
+    with pytest.raises(TransientError):
+        await policy.call(FaultyUpstream(TransientError(), TransientError()))
+    assert policy.stats.retries == 1
+    assert policy.stats.budget_exhausted == 1
+
+    # budget is refilled over time
+    clock.now = 1.0
+    assert await policy.call(FaultyUpstream(TransientError())) == 2
+    assert policy.stats.retries == 2
+
+
+@pytest.mark.anyio
+async def test_hedge_wins_over_slow_attempt(clock):
+    policy = make_policy(clock, hedge_delay=0.01)
+    upstream = FaultyUpstream(5)
+
+    assert await policy.call(upstream) == 2
+    assert policy.stats.hedges == 1
+    assert policy.stats.hedge_wins == 1
+    # losing attempt is cancelled without waiting for it
+    await asyncio.sleep(0)
+    assert upstream.cancelled == 1
+
+
+@pytest.mark.anyio
+async def test_hedge_is_limited_by_budget(clock):
+    budget = RetryBudget(ratio=0, min_per_second=0, capacity=0, clock=clock)
+    policy = make_policy(clock, hedge_delay=0.01, budget=budget)
+
+    assert await policy.call(FaultyUpstream(0.05)) == 1
+    assert policy.stats.hedges == 0
+
+
+@pytest.mark.anyio
+async def test_attempt_timeout_is_not_deadline_exceeded(clock):
+    policy = make_policy(clock, attempt_timeout=0.01, max_attempts=1)
+
+    with pytest.raises(TimeoutError):
+        await policy.call(FaultyUpstream(5))
+
+    assert policy.stats.timeouts == 1
+    assert policy.stats.deadlines_exceeded == 0
+
+
+@pytest.mark.anyio
+async def test_deadline_exceeded(clock):
+    policy = make_policy(clock, deadline=0.01)
+
+    with pytest.raises(TimeoutError):
+        await policy.call(FaultyUpstream(5))
+
+    assert policy.stats.timeouts == 0
+    assert policy.stats.deadlines_exceeded == 1
@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+import asyncio
+
+import orjson
+import pytest
+
+from src.config import CONFIG
+from src.movies import controllers
+from src.movies.exceptions import KinopoiskThrottledException
+from src.movies.models import EXACT_TITLE_SCORE, Movie
+from src.shared.cache import TTLCache
+from src.shared.ratelimit import RequestPriority
+
+
+UPSTREAM_RESULTS = {"keyword": "матрица", "pagesCount": 2, "searchFilmsCountResult": 25, "films": [{"filmId": 301}]}
+
+
+class StubKinopoiskClient:
+    """Client returning the same search results on every request, unless it is throttled."""
+
+    def __init__(self):
+        """Create client without requests."""
+        self.requests = []
+        self.throttled = False
+
+    async def get(self, path, params=None, priority=None):
+        self.requests.append((path, params, priority))
+        if self.throttled:
+            raise KinopoiskThrottledException
+        return UPSTREAM_RESULTS
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    """Stub of the upstream."""
+    client = StubKinopoiskClient()
+    monkeypatch.setattr(controllers, "kinopoisk_client", client)
+    return client
+
+
+@pytest.fixture
+def search_cache(monkeypatch, clock):
+    """Empty search results cache on the fake clock."""
+    cache = TTLCache(max_items=10, ttl=CONFIG.SEARCH_CACHE_TTL, clock=clock)
+    monkeypatch.setattr(controllers, "search_cache", cache)
+    return cache
+
+
+@pytest.fixture
+def saved_movies(monkeypatch):
+    """Scores of saved movies found by keyword, best ones first."""
+    scores = []
+
+    async def search(db_session, keyword, min_score, limit):
+        return [(orjson.dumps({"filmId": 401 + index}), score) for index, score in enumerate(scores)]
+
+    monkeypatch.setattr(Movie, "search", search)
+    return scores
+
+
+@pytest.fixture
+async def db_session(db_empty):
+    """Session of the current task like the one passed to controllers by app's dependency."""
+    return db_empty()
+
+
+async def wait_for_background_tasks():
+    for _ in range(3):
+        await asyncio.sleep(0)
+
+
+@pytest.mark.anyio
+async def test_single_exact_title_is_not_enough(db_session, saved_movies):
+    saved_movies.extend([EXACT_TITLE_SCORE] + [0.9] * (CONFIG.SEARCH_LOCAL_MIN_RESULTS - 2))
+
+    assert await controllers.search_locally(db_session, "матрица") is None
+
+
+@pytest.mark.anyio
+async def test_results_without_exact_title_are_not_enough(db_session, saved_movies):
+    saved_movies.extend([0.9] * CONFIG.SEARCH_LOCAL_MIN_RESULTS)
+
+    assert await controllers.search_locally(db_session, "матрица") is None
+
+
+@pytest.mark.anyio
+async def test_enough_local_results_are_encoded_as_upstream_ones(db_session, saved_movies):
+    saved_movies.extend([EXACT_TITLE_SCORE] + [0.9] * (CONFIG.SEARCH_LOCAL_MIN_RESULTS - 1))
+
+    data = orjson.loads(await controllers.search_locally(db_session, "матрица"))
+
+    assert data["keyword"] == "матрица"
+    assert data["searchFilmsCountResult"] == CONFIG.SEARCH_LOCAL_MIN_RESULTS
+    assert [film["filmId"] for film in data["films"]] == list(range(401, 401 + CONFIG.SEARCH_LOCAL_MIN_RESULTS))
+
+
+@pytest.mark.anyio
+async def test_local_results_are_replaced_by_upstream_ones(db_session, upstream, search_cache, saved_movies):
+    saved_movies.extend([EXACT_TITLE_SCORE] * CONFIG.SEARCH_LOCAL_MIN_RESULTS)
+
+    response = await controllers.movie_search_by_keyword("Матрица", db_session)
+
+    assert orjson.loads(response.body)["data"]["films"][0] == {"filmId": 401}
+    assert orjson.loads(search_cache.get("матрица"))["films"][0] == {"filmId": 401}
+    # complete results are requested in background
+    await wait_for_background_tasks()
+    assert upstream.requests == [
+        ("/v2.1/films/search-by-keyword", {"keyword": "матрица"}, RequestPriority.BACKGROUND),
+    ]
+    assert orjson.loads(search_cache.get("матрица")) == UPSTREAM_RESULTS
+
+
+@pytest.mark.anyio
+async def test_local_results_are_cached_shortly(db_session, clock, upstream, search_cache, saved_movies):
+    saved_movies.extend([EXACT_TITLE_SCORE] * CONFIG.SEARCH_LOCAL_MIN_RESULTS)
+    upstream.throttled = True
+
+    await controllers.movie_search_by_keyword("Матрица", db_session)
+    await wait_for_background_tasks()
+    assert len(upstream.requests) == 1
+
+    clock.now = CONFIG.SEARCH_LOCAL_CACHE_TTL - 1
+    assert orjson.loads(search_cache.get("матрица"))["films"][0] == {"filmId": 401}
+    clock.now = CONFIG.SEARCH_LOCAL_CACHE_TTL
+    assert search_cache.get("матрица") is None
+
+
+@pytest.mark.anyio
+async def test_upstream_answers_when_local_results_are_not_enough(db_session, upstream, search_cache, saved_movies):
+    saved_movies.append(EXACT_TITLE_SCORE)
+
+    response = await controllers.movie_search_by_keyword("Матрица", db_session)
+
+    assert orjson.loads(response.body)["data"] == UPSTREAM_RESULTS
+    assert upstream.requests[0][2] == RequestPriority.USER
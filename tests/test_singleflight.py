@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from src.shared.singleflight import SingleFlight
+
+
+class Upstream:
+    """Call which completes when the test releases it."""
+
+    def __init__(self):
+        """Create call which isn't released yet."""
+        self.calls = 0
+        self.cancelled = False
+        self.released = asyncio.Event()
+        self.error = None
+
+    async def __call__(self):
+        self.calls += 1
+        try:
+            await self.released.wait()
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        if self.error is not None:
+            raise self.error
+        return self.calls
+
+    def release(self, error=None):
+        self.error = error
+        self.released.set()
+
+
+@pytest.mark.anyio
+async def test_concurrent_calls_are_coalesced():
+    flights = SingleFlight()
+    upstream = Upstream()
+
+    callers = [asyncio.ensure_future(flights.do("key", upstream)) for _ in range(3)]
+    await asyncio.sleep(0)
+    assert flights.in_flight == 1
+    upstream.release()
+
+    assert await asyncio.gather(*callers) == [1, 1, 1]
+    assert upstream.calls == 1
+    assert flights.stats.calls == 1
+    assert flights.stats.coalesced == 2
+
+
+@pytest.mark.anyio
+async def test_different_keys_are_not_coalesced():
+    flights = SingleFlight()
+    upstream = Upstream()
+    upstream.release()
+
+    await asyncio.gather(flights.do("first", upstream), flights.do("second", upstream))
+
+    assert upstream.calls == 2
+
+
+@pytest.mark.anyio
+async def test_all_waiters_get_leader_exception():
+    flights = SingleFlight()
+    upstream = Upstream()
+    error = ValueError("upstream failed")
+
+    callers = [asyncio.ensure_future(flights.do("key", upstream)) for _ in range(3)]
+    await asyncio.sleep(0)
+    upstream.release(error)
+
+    results = await asyncio.gather(*callers, return_exceptions=True)
+    assert all(result is error for result in results)
+    assert upstream.calls == 1
+
+
+@pytest.mark.anyio
+async def test_cancelled_waiter_does_not_cancel_shared_call():
+    flights = SingleFlight()
+    upstream = Upstream()
+
+    leader = asyncio.ensure_future(flights.do("key", upstream))
+    waiter = asyncio.ensure_future(flights.do("key", upstream))
+    await asyncio.sleep(0)
+    leader.cancel()
+    await asyncio.sleep(0)
+    upstream.release()
+
+    assert await waiter == 1
+    assert leader.cancelled()
+    assert not upstream.cancelled
+    assert flights.stats.cancelled == 0
+
+
+@pytest.mark.anyio
+async def test_shared_call_is_cancelled_without_waiters():
+    flights = SingleFlight()
+    upstream = Upstream()
+
+    caller = asyncio.ensure_future(flights.do("key", upstream))
+    await asyncio.sleep(0)
+    caller.cancel()
+    await asyncio.sleep(0)
+    await asyncio.sleep(0)
+
+    assert upstream.cancelled
+    assert flights.in_flight == 0
+    assert flights.stats.cancelled == 1
+
+
+@pytest.mark.anyio
+async def test_key_is_released_after_completion():
+    flights = SingleFlight()
+    upstream = Upstream()
+    upstream.release()
+
+    assert await flights.do("key", upstream) == 1
+    assert flights.in_flight == 0
+    # next call isn't coalesced with the completed one
+    assert await flights.do("key", upstream) == 2
+
+
+@pytest.mark.anyio
+async def test_key_is_released_after_failure():
+    flights = SingleFlight()
+    upstream = Upstream()
+    upstream.release(ValueError("upstream failed"))
+
+    with pytest.raises(ValueError, match="upstream failed"):
+        await flights.do("key", upstream)
+    assert flights.in_flight == 0
+
+    upstream.error = None
+    assert await flights.do("key", upstream) == 2
@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+import time
+
+import jwt
+import pytest
+
+from src.auth import schemas
+from src.auth.enums import SignatureAlgorithm
+from src.auth.exceptions import ExpiredTokenException
+from src.auth.schemas import TokenPayload
+from src.config import CONFIG
+from src.shared.cache import TTLCache
+
+
+@pytest.fixture
+def token_cache(monkeypatch, clock):
+    """Empty token cache on the fake clock."""
+    cache = TTLCache(max_items=10, ttl=0, clock=clock)
+    monkeypatch.setattr(schemas, "token_cache", cache)
+    return cache
+
+
+def encode(payload):
+    return jwt.encode(payload, CONFIG.SECRET_KEY, SignatureAlgorithm.HS256.value)
+
+
+def test_payload_is_cached_until_token_expires(clock, token_cache):
+    expires_at = int(time.time()) + 60
+    token = encode({"profile_id": 1, "exp": expires_at})
+
+    clock.now = expires_at - 60
+    payload = TokenPayload.from_token(token)
+    assert payload.profile_id == 1
+
+    clock.now = expires_at - 1
+    assert TokenPayload.from_token(token) is payload
+    assert token_cache.stats.hits == 1
+
+    # cached payload isn't used once token has expired by cache's clock
+    clock.now = expires_at
+    assert TokenPayload.from_token(token) is not payload
+    assert token_cache.stats.hits == 1
+
+
+def test_expired_token_is_not_cached(token_cache):
+    token = encode({"profile_id": 1, "exp": int(time.time()) - 1})
+
+    with pytest.raises(ExpiredTokenException):
+        TokenPayload.from_token(token)
+    assert len(token_cache) == 0
+
+
+def test_token_without_expiration_is_not_cached(token_cache):
+    payload = TokenPayload.from_token(encode({"profile_id": 1}))
+
+    assert payload.profile_id == 1
+    assert len(token_cache) == 0